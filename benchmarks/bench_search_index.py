@@ -0,0 +1,68 @@
+"""
+Compares medication search strategies on synthetic catalogs:
+LIKE scan, FTS5 trigram index and the in-memory n-gram index.
+
+Usage: python benchmarks/bench_search_index.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_manager import DatabaseManager
+from utils.search_index import NgramIndex
+from synthetic import synthetic_rows
+
+QUERIES = ["amo", "para 500", "cil tab", "مول", "xyzq", "pro fen syrup"]
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000.0
+
+
+def bench_size(size, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Exact strategies only ("xyzq" would otherwise fall back to fuzzy search)
+        db = DatabaseManager(os.path.join(tmp, "bench.db"), fuzzy=False)
+
+        start = time.perf_counter()
+        db.add_medications_bulk(synthetic_rows(size))
+        insert_s = time.perf_counter() - start
+
+        index = NgramIndex()
+        start = time.perf_counter()
+        index.load(db.get_all_medications())
+        build_s = time.perf_counter() - start
+
+        print(f"\n== {size:,} rows (bulk insert {insert_s:.1f}s, index build {build_s:.1f}s) ==")
+        print(f"{'query':<16}{'LIKE ms':>10}{'FTS5 ms':>10}{'index ms':>10}{'hits':>8}")
+        for query in QUERIES:
+            words = query.split()
+            like_ms = timed(lambda: db.search_medications_like(words), repeat)
+            fts_ms = timed(lambda: db.search_medications_fts(words), repeat) if db.fts_enabled else float("nan")
+            index_ms = timed(lambda: index.search(query, 200), repeat)
+            hits = len(index.search(query, 200))
+            print(f"{query:<16}{like_ms:>10.2f}{fts_ms:>10.2f}{index_ms:>10.2f}{hits:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench_size(size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Startup benchmark: wall time from process start to the first rendered
+window of main.py (needs a display), plus the dependency check on its own
+compared with the old `pip install -r requirements.txt` on every launch.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--pip] [--no-window]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main
+
+REQUIREMENTS = os.path.join(ROOT, "requirements.txt")
+
+
+def time_window():
+    # Seconds until main.py prints its ready marker after drawing the window
+    env = dict(os.environ, RECEIPT_STARTUP_BENCH="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:
+        if line.strip() == "STARTUP_READY":
+            elapsed = time.perf_counter() - start
+            proc.wait()
+            return elapsed
+    proc.wait()
+    raise RuntimeError("main.py exited without showing a window (no display?)")
+
+
+def time_check(cold):
+    stamp = os.path.join(ROOT, main.STAMP_FILE)
+    if cold and os.path.exists(stamp):
+        os.remove(stamp)
+    start = time.perf_counter()
+    main.check_requirements(REQUIREMENTS)
+    return time.perf_counter() - start
+
+
+def time_pip():
+    start = time.perf_counter()
+    subprocess.call([sys.executable, "-m", "pip", "install", "-r", REQUIREMENTS, "--quiet"],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def report(name, samples):
+    print(f"{name:<34} median {statistics.median(samples) * 1000:9.1f} ms   "
+          f"min {min(samples) * 1000:9.1f} ms   ({len(samples)} runs)")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--pip", action="store_true", help="also time the old pip install step (slow, needs network)")
+    parser.add_argument("--no-window", action="store_true", help="skip the GUI measurement")
+    args = parser.parse_args()
+
+    report("dependency check (no stamp)", [time_check(cold=True) for _ in range(args.runs)])
+    report("dependency check (stamp matches)", [time_check(cold=False) for _ in range(args.runs)])
+    if args.pip:
+        report("pip install -r requirements.txt", [time_pip() for _ in range(args.runs)])
+    if not args.no_window:
+        report("process start -> first window", [time_window() for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for Arabic shaping on the receipt hot path.
+Replays the fix_text calls PDFGenerator.generate makes for one receipt
+(header/footer lines twice, every label, every value line) and reports
+receipts/sec with the old uncached shaping and with the cached fix_text.
+
+Usage: python benchmarks/bench_text_shaping.py [--receipts 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+import synthetic
+from utils import text_utils
+from utils.config_manager import DEFAULT_CONFIG
+
+
+def fix_text_uncached(text):
+    # fix_text as it was before caching: reshape + bidi on every call
+    if not text:
+        return ""
+    try:
+        return get_display(arabic_reshaper.reshape(text))
+    except Exception:
+        return text
+
+
+def receipt_strings(rnd):
+    """The strings shaped for one receipt, in the order generate() shapes them."""
+    strings = []
+    header = DEFAULT_CONFIG["header_text"]
+    footer = DEFAULT_CONFIG["footer_text"]
+    values = synthetic.receipt_data(rnd)
+
+    strings += [header, header]  # stringWidth + drawString
+    for field in DEFAULT_CONFIG["fields"]:
+        strings.append(field["label"] + ":")
+        strings += values[field["id"]].split("\n")
+    strings += [footer, footer]
+    return strings
+
+
+def run(shape, receipts, seed=1):
+    rnd = random.Random(seed)
+    workload = [receipt_strings(rnd) for _ in range(receipts)]
+    start = time.perf_counter()
+    for strings in workload:
+        for text in strings:
+            shape(text)
+    return receipts / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--receipts", type=int, default=2000)
+    args = parser.parse_args()
+
+    before = run(fix_text_uncached, args.receipts)
+    text_utils.clear_shape_cache()
+    after = run(text_utils.fix_text, args.receipts)
+
+    print(f"before (uncached):  {before:10,.0f} receipts/sec")
+    print(f"after  (cached):    {after:10,.0f} receipts/sec  ({after / before:.1f}x)")
+    print(f"shape cache: {text_utils.shape_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
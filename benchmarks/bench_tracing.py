@@ -0,0 +1,73 @@
+"""
+Tracing overhead: cost per call of a traced function and of a span block,
+with tracing off (should be close to a plain call) and on (stats + JSON
+log line), plus an end-to-end search with tracing on and off.
+
+Usage: python benchmarks/bench_tracing.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+from utils.tracing import tracer, traced
+
+
+def plain(x):
+    return x + 1
+
+
+@traced("bench.traced")
+def decorated(x):
+    return x + 1
+
+
+def with_span(x):
+    with tracer.span("bench.span"):
+        return x + 1
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = per_call_ns(plain, args.calls)
+        print(f"plain call:            {base:8.0f} ns")
+        for label in ("off", "on"):
+            if label == "on":
+                tracer.enable(os.path.join(tmp, "logs"))
+            print(f"traced, tracing {label:>3}:  {per_call_ns(decorated, args.calls):8.0f} ns")
+            print(f"span, tracing {label:>3}:    {per_call_ns(with_span, args.calls):8.0f} ns")
+        tracer.disable()
+
+        from utils.db_manager import DatabaseManager
+
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db.add_medications_bulk(synthetic.synthetic_rows(args.rows))
+        for label in ("off", "on"):
+            if label == "on":
+                tracer.enable(os.path.join(tmp, "logs"))
+            start = time.perf_counter()
+            for _ in range(200):
+                db.search_medications("para 500")
+            ms = (time.perf_counter() - start) / 200 * 1000
+            print(f"search ({args.rows:,} rows), tracing {label:>3}: {ms:.3f} ms")
+        tracer.disable()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Benchmark suite for the hot paths: catalog search and listing, bulk and
+row-by-row import (spreadsheet and PDF), Arabic shaping and receipt
+rendering end to end. Data is synthetic and seeded (see synthetic.py).
+
+Results are written as JSON. With --baseline, every case is compared with
+an earlier run (fastest run of each) and the process exits with status 1
+when a case got slower than --threshold and by more than --min-delta-ms.
+
+Usage:
+    python benchmarks/run_suite.py --output results.json [--sizes 10000 100000 1000000]
+    python benchmarks/run_suite.py --baseline results.json [--threshold 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic
+
+SEARCH_QUERIES = ["amo", "para 500", "cil tab", "مول", "pro fen syrup"]
+
+# Misspelled names for the typo-tolerant search
+FUZZY_QUERIES = ["amoxicilin", "paracetamole 500", "ibuprofn syrup", "مولسيلفتا"]
+
+# Row-by-row add_medication is slow; time it on a slice only
+SINGLE_INSERT_ROWS = 2000
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "runs": repeat,
+    }
+
+
+def bench_catalog(results, size, repeat, tmp):
+    from utils.db_manager import DatabaseManager
+    from utils import fuzzy_index
+
+    db = DatabaseManager(os.path.join(tmp, f"catalog_{size}.db"), fuzzy=False)
+    start = time.perf_counter()
+    db.add_medications_bulk(synthetic.synthetic_rows(size))
+    results[f"db.add_medications_bulk[{size}]"] = {
+        "median_ms": (time.perf_counter() - start) * 1000, "min_ms": None, "runs": 1,
+    }
+
+    for query in SEARCH_QUERIES:
+        results[f"db.search_medications[{size}:{query}]"] = measure(lambda: db.search_medications(query), repeat)
+    results[f"db.get_all_medications[{size}]"] = measure(db.get_all_medications, max(1, repeat // 2))
+
+    start = time.perf_counter()
+    fuzzy_index.load_index(db)
+    results[f"fuzzy_index.load[{size}]"] = {
+        "median_ms": (time.perf_counter() - start) * 1000, "min_ms": None, "runs": 1,
+    }
+    for query in FUZZY_QUERIES:
+        results[f"db.search_medications_fuzzy[{size}:{query}]"] = measure(
+            lambda: db.search_medications_fuzzy(query), repeat)
+    fuzzy_index.drop_index(db.db_name)
+
+
+def bench_import(results, size, repeat, tmp):
+    from utils.db_manager import DatabaseManager
+    from utils.importer import FileImporter, _workbook_cache
+
+    rows = list(synthetic.synthetic_rows(size, seed=7))
+    sheet = synthetic.write_excel(os.path.join(tmp, f"import_{size}.xlsx"), rows)
+    pdf = synthetic.write_pdf(os.path.join(tmp, f"import_{size}.pdf"), (en for _, en in rows[:min(size, 20000)]))
+    importer = FileImporter(pdf_workers=1)
+
+    def read_sheet():
+        _workbook_cache.clear()  # time the parse, not the cache
+        data, msg = importer.get_column_data(sheet, 1)
+        if data is None:
+            raise RuntimeError(msg)
+        return data
+
+    results[f"importer.get_column_data[{size}]"] = measure(read_sheet, repeat, warmup=0)
+    results[f"importer.iter_pdf_pages[{min(size, 20000)}]"] = measure(
+        lambda: sum(len(lines) for _, lines in importer.iter_pdf_pages(pdf)), 1, warmup=0)
+
+    names = read_sheet()
+    runs = iter(range(1000))
+
+    def bulk():
+        db = DatabaseManager(os.path.join(tmp, f"bulk_{size}_{next(runs)}.db"))
+        db.add_medications_bulk(("", name) for name in names)
+
+    def single():
+        db = DatabaseManager(os.path.join(tmp, f"single_{size}_{next(runs)}.db"))
+        for name in names[:SINGLE_INSERT_ROWS]:
+            db.add_medication("", name)
+
+    results[f"import.excel_bulk[{size}]"] = measure(bulk, 1, warmup=0)
+    results[f"import.excel_add_medication[{min(size, SINGLE_INSERT_ROWS)}]"] = measure(single, 1, warmup=0)
+
+
+def bench_shaping(results, repeat):
+    from utils import text_utils
+
+    rnd = random.Random(1)
+    strings = []
+    for _ in range(500):
+        data = synthetic.receipt_data(rnd)
+        strings += [value for value in data.values()] + data["items"].split("\n")
+
+    def shape_all():
+        for text in strings:
+            text_utils.fix_text(text)
+
+    def shape_cold():
+        text_utils.clear_shape_cache()
+        shape_all()
+
+    results["text_utils.fix_text[500 receipts, cold]"] = measure(shape_cold, repeat)
+    results["text_utils.fix_text[500 receipts, cached]"] = measure(shape_all, repeat)
+
+
+def bench_render(results, repeat):
+    import copy
+    from utils.config_manager import ConfigManager, DEFAULT_CONFIG
+    from utils.printer import PDFGenerator
+
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["show_logo"] = True
+    generator = PDFGenerator(ConfigManager(config))
+    rnd = random.Random(3)
+    receipts = [synthetic.receipt_data(rnd) for _ in range(20)]
+    paths = []
+
+    def generate_all():
+        for data in receipts:
+            paths.append(generator.generate(data))
+
+    results["printer.generate[20 receipts]"] = measure(generate_all, repeat)
+    results["printer.render[20 receipts]"] = measure(lambda: [generator.render(d) for d in receipts], repeat)
+    for path in paths:
+        os.remove(path)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def best_ms(result):
+    # The fastest run is the least noisy number when there were several
+    return result["min_ms"] if result.get("min_ms") is not None else result["median_ms"]
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Prints a comparison table; returns the names of regressed cases."""
+    regressions = []
+    print(f"{'case':<52}{'baseline ms':>14}{'now ms':>12}{'change':>10}")
+    for name, result in current["results"].items():
+        now = best_ms(result)
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:<52}{'-':>14}{now:>12.2f}{'new':>10}")
+            continue
+        before = best_ms(before)
+        change = now / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold and now - before > min_delta_ms:
+            flag = "  SLOWER"
+            regressions.append(name)
+        print(f"{name:<52}{before:>14.2f}{now:>12.2f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare with an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    # Rendering looks for icon.png in the working directory
+    os.chdir(ROOT)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            print(f"catalog {size:,} rows...", file=sys.stderr)
+            bench_catalog(results, size, args.repeat, tmp)
+            bench_import(results, size, args.repeat, tmp)
+    bench_shaping(results, args.repeat)
+    bench_render(results, args.repeat)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sizes": args.sizes,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    elif not args.output:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
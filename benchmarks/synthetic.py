@@ -0,0 +1,72 @@
+"""
+Synthetic data for the benchmarks: bilingual medication catalogs,
+spreadsheets, multi-page PDFs and receipt data. Everything is seeded, so
+the same arguments always produce the same data.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYLLABLES_EN = ["amo", "xi", "cil", "lin", "para", "ce", "ta", "mol", "ibu", "pro", "fen", "met", "for", "min", "ator", "va", "sta", "tin", "lo", "sar", "tan"]
+SYLLABLES_AR = ["أمو", "كسي", "سيل", "لين", "بارا", "سي", "تا", "مول", "ايبو", "برو", "فين", "ميت", "فور", "مين", "فا", "ستا", "تين"]
+FORMS = ["tab", "caps", "syrup", "inj", "cream", "drops"]
+
+CUSTOMERS = ["محمد أحمد", "سارة علي", "Ahmed Hassan", "خالد يوسف", "Mona Saleh"]
+ITEMS = ["باراسيتامول 500 ملغ", "Amoxicillin 500mg caps", "ايبوبروفين شراب", "Vitamin C 1000", "مرهم جلدي"]
+
+
+def synthetic_rows(count, seed=42):
+    """(name_ar, name_en) pairs; every English name is unique."""
+    rnd = random.Random(seed)
+    for i in range(count):
+        en = "".join(rnd.choice(SYLLABLES_EN) for _ in range(rnd.randint(2, 4))).capitalize()
+        ar = "".join(rnd.choice(SYLLABLES_AR) for _ in range(rnd.randint(2, 4)))
+        dose = rnd.choice([50, 100, 250, 500, 1000])
+        yield f"{ar} {dose}", f"{en} {dose}mg {rnd.choice(FORMS)} #{i}"
+
+
+def receipt_data(rnd):
+    return {
+        "date": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        "customer_name": rnd.choice(CUSTOMERS),
+        "items": "\n".join(rnd.choice(ITEMS) for _ in range(rnd.randint(1, 5))),
+        "total": f"{rnd.randint(5, 500)}.00",
+    }
+
+
+def write_excel(path, rows):
+    """Spreadsheet with a header row and one (name_ar, name_en) row per drug."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["name_ar", "name_en"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def write_pdf(path, names, lines_per_page=45):
+    """Multi-page PDF listing one drug name per line (Latin names extract reliably)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    y = height - 40
+    line = 0
+    c.setFont("Helvetica", 11)
+    for name in names:
+        c.drawString(40, y, name)
+        y -= 16
+        line += 1
+        if line == lines_per_page:
+            c.showPage()
+            c.setFont("Helvetica", 11)
+            y = height - 40
+            line = 0
+    c.save()
+    return path
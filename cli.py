@@ -0,0 +1,197 @@
+"""
+Command-line interface (no Tk window).
+
+    python main.py search <query> [--limit N] [--fuzzy]
+    python main.py import <file> [--column N] [--target ar|en]
+    python main.py render <output.pdf> [--set FIELD=VALUE ...] [--from SHEET [--split] [--map FIELD=COLUMN]]
+    python main.py print [--set FIELD=VALUE ...]
+    python main.py export <output.csv>
+
+Only the modules a command needs are imported (search never loads
+reportlab or pandas). --timing reports the cold-start cost; --trace (or
+RECEIPT_TRACE=1) records timing spans to logs/spans.jsonl and logs/metrics.prom.
+"""
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import os
+import sys
+
+# Modules worth reporting in --timing output
+HEAVY_MODULES = ("tkinter", "reportlab", "pandas", "openpyxl", "pdfplumber", "PIL", "arabic_reshaper")
+
+EXPORT_PAGE_SIZE = 5000
+
+
+def parse_fields(items):
+    data = {}
+    for item in items:
+        if "=" not in item:
+            raise SystemExit(f"Expected FIELD=VALUE, got '{item}'")
+        key, value = item.split("=", 1)
+        data[key] = value.replace("\\n", "\n")
+    return data
+
+
+def cmd_search(args):
+    from utils.db_manager import DatabaseManager
+
+    # The typo-tolerant index is built in memory, so it is opt-in for a one-shot process
+    db = DatabaseManager(args.db, fuzzy=args.fuzzy)
+    for _, name_ar, name_en in db.search_medications(args.query, limit=args.limit):
+        print(" | ".join(name for name in (name_ar, name_en) if name))
+    return 0
+
+
+def cmd_import(args):
+    from utils.db_manager import DatabaseManager
+    from utils.importer import FileImporter
+
+    importer = FileImporter()
+    file_type = importer.identify_file_type(args.file)
+    if file_type == "pdf":
+        names = (line for _, lines in importer.iter_pdf_pages(args.file) for line in lines)
+    elif file_type == "excel":
+        names, msg = importer.get_column_data(args.file, args.column)
+        if names is None:
+            print(msg, file=sys.stderr)
+            return 1
+    else:
+        print(f"Unsupported file: {args.file}", file=sys.stderr)
+        return 1
+
+    rows = ((name, "") if args.target == "ar" else ("", name) for name in names)
+    inserted, skipped = DatabaseManager(args.db).add_medications_bulk(rows)
+    print(f"Imported {inserted}, skipped {skipped} (duplicates or empty)")
+    return 0
+
+
+def cmd_render(args):
+    from utils.config_manager import ConfigManager
+
+    config = ConfigManager()
+    if args.source:
+        from utils.batch import run_batch, SINGLE, SPLIT
+
+        result = run_batch(config, args.source, args.output, SPLIT if args.split else SINGLE,
+                           parse_fields(args.map), args.workers)
+        print(result.summary())
+        return 0
+
+    from utils.printer import PDFGenerator
+
+    pdf = PDFGenerator(config).render(parse_fields(args.set))
+    with open(args.output, "wb") as f:
+        f.write(pdf)
+    print(f"Wrote {args.output} ({len(pdf)} bytes)")
+    return 0
+
+
+def cmd_print(args):
+    from utils.config_manager import ConfigManager
+    from utils.printer import PDFGenerator
+    from utils.print_backends import create_backend
+    from utils.print_queue import PrintQueue, queue_db_path, DONE
+
+    config = ConfigManager()
+    # Goes through the persistent queue so failures are retried by the app later
+    queue = PrintQueue(create_backend(config, PDFGenerator(config)), queue_db_path(args.db))
+    job_id = queue.enqueue(parse_fields(args.set))
+    # Only this job: anything else pending belongs to the app's own worker
+    queue.process_job(job_id)
+
+    for row_id, status, attempts, last_error, _, _ in queue.list_jobs():
+        if row_id == job_id:
+            print(f"Job {job_id}: {status}" + (f" ({last_error})" if last_error else ""))
+            return 0 if status == DONE else 1
+    return 1
+
+
+def cmd_export(args):
+    import csv
+    from utils.db_manager import DatabaseManager, page_key
+
+    db = DatabaseManager(args.db)
+    count = 0
+    # utf-8-sig so Excel opens the Arabic names correctly
+    with open(args.output, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name_ar", "name_en"])
+        after = None
+        while True:
+            rows = db.get_medications_page(after, EXPORT_PAGE_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            count += len(rows)
+            after = page_key(rows[-1])
+    print(f"Exported {count} medications to {args.output}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="receipt", description="Receipt printing without the GUI.")
+    parser.add_argument("--db", default="receipts.db", help="medications database")
+    parser.add_argument("--timing", action="store_true", help="report cold-start time and heavy imports")
+    parser.add_argument("--trace", action="store_true", help="record timing spans under logs/")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("search", help="search the medications catalog")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--fuzzy", action="store_true",
+                   help="typo-tolerant fallback when nothing matches (builds the index first)")
+    p.set_defaults(func=cmd_search)
+
+    p = commands.add_parser("import", help="import names from a PDF or spreadsheet column")
+    p.add_argument("file")
+    p.add_argument("--column", type=int, default=0, help="spreadsheet column (0-based)")
+    p.add_argument("--target", choices=("ar", "en"), default="ar")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser("render", help="render a receipt (or a spreadsheet of receipts) to PDF")
+    p.add_argument("output")
+    p.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE")
+    p.add_argument("--from", dest="source", metavar="SHEET", help="one receipt per spreadsheet row")
+    p.add_argument("--split", action="store_true", help="with --from: one PDF per receipt in OUTPUT dir")
+    p.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN")
+    p.add_argument("--workers", type=int, default=0)
+    p.set_defaults(func=cmd_render)
+
+    p = commands.add_parser("print", help="print a receipt with the configured backend")
+    p.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE")
+    p.set_defaults(func=cmd_print)
+
+    p = commands.add_parser("export", help="export the medications catalog to CSV")
+    p.add_argument("output")
+    p.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def report_timing(started_command):
+    now = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"startup {(started_command - _START) * 1000:.0f} ms, "
+          f"command {(now - started_command) * 1000:.0f} ms, "
+          f"total {(now - _START) * 1000:.0f} ms; "
+          f"heavy modules loaded: {', '.join(loaded) or 'none'}", file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace or os.environ.get("RECEIPT_TRACE") == "1":
+        from utils.tracing import tracer
+        tracer.enable()
+    started_command = time.perf_counter()
+    try:
+        return args.func(args)
+    finally:
+        if args.timing:
+            report_timing(started_command)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,26 @@
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
 from utils.config_manager import ConfigManager
 from utils.printer import PDFGenerator
-from gui_import import ImportEditorWindow
-from gui_db import DatabaseEditorWindow
+from gui_print import PrintQueueWindow
 from utils.db_manager import DatabaseManager
+from utils.print_queue import PrintQueue, queue_db_path
+from utils.print_backends import create_backend
+from utils.printer_monitor import PrinterMonitor, Win32StatusSource
+from utils.background_search import BackgroundSearch
+from utils import fuzzy_index
+from utils.tracing import tracer, traced
 from bidi.algorithm import get_display
 
+STATUS_POLL_MS = 250
+
+PRINT_BACKEND_LABELS = {
+    "shell": "طابعة ويندوز (PDF)",
+    "spool": "حفظ في مجلد (spool)",
+    "escpos": "طابعة حرارية مباشرة (ESC/POS)",
+}
+
 class SearchPopup(tk.Toplevel):
     def __init__(self, parent, db_manager, initial_query, on_select_callback):
         super().__init__(parent)
@@ -19,6 +33,13 @@ class SearchPopup(tk.Toplevel):
         self.transient(parent)
         self.grab_set()
         
+        # Searches run off the Tk thread; only the newest result is shown
+        self.searcher = BackgroundSearch(self, self.run_search, self.show_results)
+        if self.db.fuzzy:
+            # Ready by the time a misspelled name finds nothing
+            fuzzy_index.warm_index(self.db)
+        self.bind("<Destroy>", self.on_destroy)
+        
         self.setup_ui(initial_query)
         self.search_var.set(initial_query) # Trigger search
         self.entry.focus_set()
@@ -59,17 +80,26 @@ class SearchPopup(tk.Toplevel):
         self.listbox.bind("<Return>", self.select_current)
         
     def on_search(self, *args):
-        query = self.search_var.get()
-        self.listbox.delete(0, tk.END)
-        
-        if query:
-            results = self.db.search_medications(query)
-            for _, ar, en in results:
-                self.listbox.insert(tk.END, f"{ar} | {en}")
-        else:
+        self.searcher.submit(self.search_var.get())
+
+    def run_search(self, query):
+        # Worker thread
+        if not query.strip():
             # Show nothing or recent? Show nothing to be clean
-            pass
+            return []
+        return self.db.search_medications(query)
 
+    @traced("gui.search_popup.show_results")
+    def show_results(self, results):
+        self.listbox.delete(0, tk.END)
+        if results:
+            self.listbox.insert(tk.END, *[f"{ar} | {en}" for _, ar, en in results])
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.searcher.close()
+
+    @traced("gui.search_popup.select_current")
     def select_current(self, event=None):
         selection = self.listbox.curselection()
         if selection:
@@ -172,6 +202,14 @@ class SettingsWindow:
         self.show_logo_var = tk.BooleanVar(value=self.config.get("show_logo", False))
         ttk.Checkbutton(tab, text="عرض الشعار (icon.png)", variable=self.show_logo_var).pack(anchor='e', pady=(0, 10))
 
+        # In-memory search index
+        self.memory_index_var = tk.BooleanVar(value=self.config.get("memory_search_index", False))
+        ttk.Checkbutton(tab, text="بحث سريع (فهرس في الذاكرة)", variable=self.memory_index_var).pack(anchor='e', pady=(0, 10))
+
+        # Typo-tolerant fallback
+        self.fuzzy_search_var = tk.BooleanVar(value=self.config.get("fuzzy_search", True))
+        ttk.Checkbutton(tab, text="بحث تقريبي عند عدم وجود نتائج (أخطاء إملائية)", variable=self.fuzzy_search_var).pack(anchor='e', pady=(0, 10))
+
         # Header/Footer
         ttk.Label(tab, text="نص الرأس:").pack(anchor='e', pady=(0, 5))
         self.header_entry = ttk.Entry(tab, justify='right')
@@ -203,6 +241,26 @@ class SettingsWindow:
             
         self.printer_combo.pack(fill='x', pady=(0, 15))
 
+        # Print backend
+        ttk.Label(tab, text="طريقة الطباعة:").pack(anchor='e', pady=(0, 5))
+        self.backend_combo = ttk.Combobox(tab, state="readonly", values=list(PRINT_BACKEND_LABELS.values()))
+        self.backend_combo.set(PRINT_BACKEND_LABELS.get(self.config.get("print_backend", "shell"), PRINT_BACKEND_LABELS["shell"]))
+        self.backend_combo.pack(fill='x', pady=(0, 15))
+
+        # ESC/POS target: tcp://host:port, file:path or a device path
+        ttk.Label(tab, text="عنوان الطابعة الحرارية (tcp://ip:9100 أو مسار الجهاز):").pack(anchor='e', pady=(0, 5))
+        self.escpos_entry = ttk.Entry(tab)
+        self.escpos_entry.insert(0, self.config.get("escpos_target", ""))
+        self.escpos_entry.pack(fill='x', pady=(0, 15))
+
+        # Font (empty = search the system for an Arabic font)
+        ttk.Label(tab, text="مسار الخط (اختياري، ملف TTF):").pack(anchor='e', pady=(0, 5))
+        self.font_entry = ttk.Entry(tab)
+        self.font_entry.insert(0, self.config.get("font_path", ""))
+        self.font_entry.pack(fill='x', pady=(0, 5))
+        resolved_font = self.config.get("resolved_font", "") or "Helvetica (بدون دعم للعربية)"
+        ttk.Label(tab, text=f"الخط المستخدم: {resolved_font}", foreground="#7f8c8d").pack(anchor='e', pady=(0, 15))
+
         # Paper Settings Frame
         paper_frame = ttk.LabelFrame(tab, text="إعدادات الورق (mm)", padding=15)
         paper_frame.pack(fill='x', pady=10)
@@ -289,19 +347,29 @@ class SettingsWindow:
         self.new_label_entry.delete(0, tk.END)
         self.new_id_entry.delete(0, tk.END)
 
+    @traced("gui.settings.save")
     def save_settings(self):
-        self.config.set("header_text", self.header_entry.get())
-        self.config.set("footer_text", self.footer_entry.get())
-        self.config.set("printer_name", self.printer_combo.get())
-        self.config.set("show_logo", self.show_logo_var.get())
+        # One write (and one change notification) for the whole dialog
+        with self.config.batch():
+            self.config.set("header_text", self.header_entry.get())
+            self.config.set("footer_text", self.footer_entry.get())
+            self.config.set("printer_name", self.printer_combo.get())
+            self.config.set("show_logo", self.show_logo_var.get())
+            self.config.set("memory_search_index", self.memory_index_var.get())
+            self.config.set("fuzzy_search", self.fuzzy_search_var.get())
+            for name, label in PRINT_BACKEND_LABELS.items():
+                if label == self.backend_combo.get():
+                    self.config.set("print_backend", name)
+            self.config.set("escpos_target", self.escpos_entry.get().strip())
+            self.config.set("font_path", self.font_entry.get().strip())
         
-        try:
-            self.config.set("paper_width", float(self.width_entry.get()))
-            self.config.set("paper_height", float(self.height_entry.get()))
-        except ValueError:
-            pass # Ignore invalid numbers for now
+            try:
+                self.config.set("paper_width", float(self.width_entry.get()))
+                self.config.set("paper_height", float(self.height_entry.get()))
+            except ValueError:
+                pass # Ignore invalid numbers for now
             
-        self.config.set("auto_height", self.auto_height_var.get())
+            self.config.set("auto_height", self.auto_height_var.get())
         self.on_save()
         self.window.destroy()
 
@@ -315,14 +383,28 @@ class ReceiptApp:
         self.setup_styles()
         
         self.config = ConfigManager()
+        tracer.configure(self.config)
         self.printer = PDFGenerator(self.config)
-        self.db = DatabaseManager()
+        self.db = DatabaseManager(
+            use_index=self.config.get("memory_search_index", False),
+            fuzzy=self.config.get("fuzzy_search", True)
+        )
+        self.print_queue = PrintQueue(
+            create_backend(self.config, self.printer),
+            queue_db_path(self.db.db_name)
+        ).start()
         self.entries = {}
         
         self.status_var = tk.StringVar(value="جاري التحقق من الطابعة...")
         
         self.create_main_layout()
-        self.check_printer_status()
+
+        # Printer status is checked off the Tk thread
+        self.status_events = queue.Queue()
+        self.printer_monitor = PrinterMonitor(Win32StatusSource(self.printer), self.config.get("printer_name"))
+        self.printer_monitor.add_listener(self.status_events.put)
+        self.printer_monitor.start()
+        self.poll_printer_status()
 
     def setup_styles(self):
         self.style = ttk.Style()
@@ -380,18 +462,25 @@ class ReceiptApp:
         # Status Bar
         self.style.configure("Status.TLabel", background="#dfe6e9", font=("Segoe UI", 9), padding=(10, 5))
 
-    def check_printer_status(self):
-        printer_name = self.config.get("printer_name")
-        if printer_name:
-            try:
-                status = self.printer.get_printer_status(printer_name)
-                self.status_var.set(f"الطابعة: {printer_name} | الحالة: {status}")
-            except Exception as e:
-                 self.status_var.set(f"خطأ في الطابعة: {e}")
-        else:
+    def show_printer_status(self, status):
+        if not status.printer:
             self.status_var.set("لم يتم اختيار طابعة (الرجاء ضبط الإعدادات)")
-        
-        self.root.after(5000, self.check_printer_status)
+        elif status.error:
+            self.status_var.set(f"خطأ في الطابعة: {status.printer} | {status.error}")
+        else:
+            self.status_var.set(f"الطابعة: {status.printer} | الحالة: {status.status}")
+
+    def poll_printer_status(self):
+        # Status changes arrive from the monitor thread; only the newest matters
+        latest = None
+        while True:
+            try:
+                latest = self.status_events.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            self.show_printer_status(latest)
+        self.root.after(STATUS_POLL_MS, self.poll_printer_status)
 
     def create_main_layout(self):
         # Clear existing
@@ -407,6 +496,12 @@ class ReceiptApp:
         
         # Database Button
         ttk.Button(top_bar, text="🗄 قاعدة البيانات", style="Info.TButton", command=self.open_database).pack(side='left', padx=10)
+
+        # Print Queue Button
+        ttk.Button(top_bar, text="🖨 طابور الطباعة", style="Info.TButton", command=self.open_print_queue).pack(side='left')
+
+        # Performance Button
+        ttk.Button(top_bar, text="📊 الأداء", style="Info.TButton", command=self.open_metrics).pack(side='left', padx=10)
         
         # Title (Optional)
         ttk.Label(top_bar, text="إصدار إيصال جديد", font=("Segoe UI", 16, "bold")).pack(side='right')
@@ -496,6 +591,7 @@ class ReceiptApp:
             
             self.entries[field['id']] = ent
 
+    @traced("gui.open_search_popup")
     def open_search_popup(self, entry_widget):
         current_text = entry_widget.get()
         
@@ -514,12 +610,18 @@ class ReceiptApp:
                 data[fid] = widget.get()
         return data
 
+    @traced("gui.open_database")
     def open_database(self):
-        DatabaseEditorWindow(self.root)
+        # Loaded on first use; keeps the importers out of the startup path
+        from gui_db import DatabaseEditorWindow
+        DatabaseEditorWindow(self.root, self.config)
 
+    @traced("gui.import_data")
     def import_data(self):
+        from gui_import import ImportEditorWindow
         ImportEditorWindow(self.root, self.config, self.fill_form)
 
+    @traced("gui.fill_form")
     def fill_form(self, data):
         for fid, value in data.items():
             if fid in self.entries:
@@ -531,18 +633,35 @@ class ReceiptApp:
                     widget.delete(0, tk.END)
                     widget.insert(0, value)
 
+    @traced("gui.preview_receipt")
     def preview_receipt(self):
         data = self.get_data()
-        self.printer.generate(data)
-        self.printer.open_preview()
+        self.printer.open_preview(self.printer.render(data))
 
+    @traced("gui.print_receipt")
     def print_receipt(self):
+        # Queued: rendering and sending happen on the print worker
         data = self.get_data()
-        self.printer.generate(data)
-        self.printer.print_file()
+        job_id = self.print_queue.enqueue(data)
+        self.status_var.set(f"تمت إضافة الإيصال إلى طابور الطباعة (#{job_id})")
+
+    @traced("gui.open_print_queue")
+    def open_print_queue(self):
+        PrintQueueWindow(self.root, self.print_queue)
+
+    def open_metrics(self):
+        from gui_metrics import MetricsWindow
+        MetricsWindow(self.root, self.config)
 
+    @traced("gui.open_settings")
     def open_settings(self):
         SettingsWindow(self.root, self.config, self.refresh_ui)
 
+    @traced("gui.refresh_ui")
     def refresh_ui(self):
+        tracer.configure(self.config)
+        self.db.use_index = self.config.get("memory_search_index", False)
+        self.db.fuzzy = self.config.get("fuzzy_search", True)
+        self.print_queue.set_backend(create_backend(self.config, self.printer))
+        self.printer_monitor.set_printer(self.config.get("printer_name"))
         self.create_main_layout()
\ No newline at end of file
@@ -1,16 +1,120 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from utils.db_manager import DatabaseManager
-from utils.importer import FileImporter
+from utils.db_manager import DatabaseManager, MedicationPager, ListPager
+from utils import fuzzy_index
+from utils.importer import FileImporter, PREVIEW_ROWS, PDF_PREVIEW_PAGES
+from utils.background_search import BackgroundSearch
+from utils.import_jobs import ImportJob
+from utils.tracing import traced
+from gui_widgets import VirtualListbox
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class ImportProgressDialog(tk.Toplevel):
+    """
+    Shows the progress of a running ImportJob (rows/sec, ETA) with a cancel
+    button, then a final summary. Polls the job with after().
+    """
+
+    def __init__(self, parent, job, on_finish):
+        super().__init__(parent)
+        self.title("جاري الاستيراد")
+        self.geometry("420x170")
+        self.resizable(False, False)
+        self.job = job
+        self.on_finish = on_finish
+
+        self.transient(parent)
+        self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.bind("<Destroy>", self.on_destroy)
+
+        frame = ttk.Frame(self, padding=15)
+        frame.pack(fill='both', expand=True)
+
+        self.progress = ttk.Progressbar(frame, mode='determinate', maximum=100)
+        self.progress.pack(fill='x', pady=(0, 10))
+
+        self.status_var = tk.StringVar(value="جاري التحضير...")
+        ttk.Label(frame, textvariable=self.status_var, anchor='e').pack(fill='x')
+
+        self.cancel_btn = ttk.Button(frame, text="إلغاء", style="Danger.TButton", command=self.cancel)
+        self.cancel_btn.pack(pady=(10, 0))
+
+        self.poll()
+
+    def cancel(self):
+        # The worker rolls back the chunk in progress and stops
+        self.job.cancel()
+        self.cancel_btn.config(state='disabled')
+        self.status_var.set("جاري الإلغاء...")
+
+    def on_destroy(self, event):
+        # Parent window closed mid-import: stop the worker too
+        if event.widget is self and not self.job.done:
+            self.job.cancel()
+
+    def poll(self):
+        if not self.winfo_exists():
+            return
+        job = self.job
+        if job.done:
+            self.finish()
+            return
+
+        fraction = job.fraction()
+        if fraction is None:
+            if self.progress['mode'] != 'indeterminate':
+                self.progress.config(mode='indeterminate')
+                self.progress.start(15)
+        else:
+            if self.progress['mode'] != 'determinate':
+                self.progress.stop()
+                self.progress.config(mode='determinate')
+            self.progress['value'] = fraction * 100
+
+        if not job.cancelled:
+            status = f"{job.processed:,} سطر | {job.rate():,.0f} سطر/ث"
+            eta = job.eta()
+            if eta is not None:
+                status += f" | المتبقي: {format_duration(eta)}"
+            self.status_var.set(status)
+
+        self.after(200, self.poll)
+
+    def finish(self):
+        job = self.job
+        self.grab_release()
+        self.destroy()
+
+        summary = (f"تم استيراد {job.inserted} عنصر بنجاح.\n"
+                   f"تم تخطي {job.skipped} عنصر (مكرر أو فارغ).\n"
+                   f"المدة: {format_duration(job.elapsed())}")
+        if job.error:
+            messagebox.showerror("خطأ", f"{job.error}\n\n{summary}")
+        elif job.cancelled:
+            messagebox.showwarning("تم الإلغاء", f"تم إلغاء الاستيراد (تم الاحتفاظ بما سبق حفظه).\n{summary}")
+        else:
+            messagebox.showinfo("تم الاستيراد", summary)
+        self.on_finish()
+
 
 class DatabaseEditorWindow:
-    def __init__(self, parent):
+    def __init__(self, parent, config=None):
         self.window = tk.Toplevel(parent)
         self.window.title("إدارة قاعدة البيانات (الأدوية)")
         self.window.geometry("800x600")
         
-        self.db = DatabaseManager()
-        self.importer = FileImporter()
+        self.db = DatabaseManager(fuzzy=config.get("fuzzy_search", True) if config else True)
+        if self.db.fuzzy:
+            fuzzy_index.warm_index(self.db)
+        self.importer = FileImporter(pdf_workers=config.get("pdf_workers", 0) if config else None)
+        self.searcher = BackgroundSearch(self.window, self.load_items, self.show_items)
+        self.window.bind("<Destroy>", self.on_destroy)
         
         self.setup_ui()
         self.refresh_list()
@@ -36,22 +140,13 @@ class DatabaseEditorWindow:
         entry = ttk.Entry(search_frame, textvariable=self.search_var)
         entry.pack(side='right', fill='x', expand=True, padx=5)
         
-        # List
-        list_frame = ttk.Frame(tab)
-        list_frame.pack(fill='both', expand=True)
-        
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side='right', fill='y')
-        
-        self.items_listbox = tk.Listbox(
-            list_frame, 
-            font=("Segoe UI", 11),
-            activestyle='none',
-            yscrollcommand=scrollbar.set,
-            selectmode=tk.SINGLE
+        # List (only the visible rows are loaded)
+        self.items_list = VirtualListbox(
+            tab,
+            format_row=lambda row: f"{row[1]} | {row[2]}",
+            font=("Segoe UI", 11)
         )
-        self.items_listbox.pack(fill='both', expand=True)
-        scrollbar.config(command=self.items_listbox.yview)
+        self.items_list.pack(fill='both', expand=True)
         
         # Actions
         action_frame = ttk.LabelFrame(tab, text="إجراءات", padding=10)
@@ -104,23 +199,27 @@ class DatabaseEditorWindow:
         self.current_file_type = None
 
     def on_search(self, *args):
-        query = self.search_var.get()
-        self.refresh_list(query)
+        self.searcher.submit(self.search_var.get())
+
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            self.searcher.close()
+
+    def load_items(self, query=""):
+        # Returns a pager: search results in memory, or the whole catalog page by page
+        if query.strip():
+            return ListPager(self.db.search_medications(query))
+        return MedicationPager(self.db)
 
     def refresh_list(self, query=""):
-        self.items_listbox.delete(0, tk.END)
-        self.item_ids = [] # Keep track of IDs
-        
-        if query:
-            items = self.db.search_medications(query)
-        else:
-            items = self.db.get_all_medications()
-            
-        for mid, name_ar, name_en in items:
-            display_text = f"{name_ar} | {name_en}"
-            self.items_listbox.insert(tk.END, display_text)
-            self.item_ids.append(mid)
+        # After edits: reload but stay at the same scroll position
+        self.items_list.set_pager(self.load_items(query), keep_position=True)
+
+    @traced("gui.db.show_items")
+    def show_items(self, pager):
+        self.items_list.set_pager(pager)
 
+    @traced("gui.db.add_item")
     def add_item(self):
         ar = self.new_item_ar.get().strip()
         en = self.new_item_en.get().strip()
@@ -133,12 +232,13 @@ class DatabaseEditorWindow:
         else:
             messagebox.showerror("خطأ", msg)
 
+    @traced("gui.db.delete_item")
     def delete_item(self):
-        idx = self.items_listbox.curselection()
-        if not idx: return
+        row = self.items_list.get_selected_row()
+        if not row: return
         
-        mid = self.item_ids[idx[0]]
-        name = self.items_listbox.get(idx[0])
+        mid = row[0]
+        name = self.items_list.format_row(row)
         
         if messagebox.askyesno("تأكيد", f"هل أنت متأكد من حذف '{name}'؟"):
             success, msg = self.db.delete_medication(mid)
@@ -147,6 +247,7 @@ class DatabaseEditorWindow:
             else:
                 messagebox.showerror("خطأ", msg)
 
+    @traced("gui.db.clear_database")
     def clear_database(self):
         if messagebox.askyesno("تحذير خطير", "هل أنت متأكد من مسح جميع البيانات في قاعدة البيانات؟ لا يمكن التراجع عن هذا الإجراء!"):
             success, msg = self.db.clear_all_data()
@@ -156,6 +257,7 @@ class DatabaseEditorWindow:
             else:
                 messagebox.showerror("خطأ", msg)
 
+    @traced("gui.db.open_file")
     def open_file(self):
         file_path = filedialog.askopenfilename(
             filetypes=[("All Supported", "*.pdf;*.xlsx;*.xls"), ("PDF Files", "*.pdf"), ("Excel Files", "*.xlsx;*.xls")]
@@ -168,10 +270,12 @@ class DatabaseEditorWindow:
         self.current_file_type = ftype
         
         if ftype == 'pdf':
-            text = self.importer.extract_text_from_pdf(file_path)
+            # Preview only the first pages; the import reads the file itself
+            text = self.importer.preview_text_from_pdf(file_path)
             self.show_pdf_preview(text)
         elif ftype == 'excel':
-            data = self.importer.extract_data_from_excel(file_path)
+            # Only the first rows are needed to pick a column
+            data = self.importer.extract_data_from_excel(file_path, max_rows=PREVIEW_ROWS)
             if isinstance(data, tuple):
                 messagebox.showerror("Error", data[1])
             else:
@@ -179,13 +283,19 @@ class DatabaseEditorWindow:
         else:
             messagebox.showerror("Error", "نوع ملف غير مدعوم")
 
+    @traced("gui.db.show_pdf_preview")
     def show_pdf_preview(self, text):
         for widget in self.preview_frame.winfo_children(): widget.destroy()
         for widget in self.controls_frame.winfo_children(): widget.destroy()
         
+        # The import reads every page from the file itself, not this text
+        ttk.Label(self.preview_frame,
+                  text=f"معاينة أول {PDF_PREVIEW_PAGES} صفحات فقط (للقراءة فقط) - الاستيراد يشمل كل صفحات الملف",
+                  anchor='e').pack(fill='x', pady=(0, 5))
         text_widget = tk.Text(self.preview_frame, wrap="word", font=("Segoe UI", 10))
         text_widget.pack(fill='both', expand=True)
         text_widget.insert("1.0", text)
+        text_widget.config(state="disabled")
         
         # Options for PDF import (which field?)
         opts_frame = ttk.Frame(self.controls_frame)
@@ -197,8 +307,9 @@ class DatabaseEditorWindow:
         ttk.Radiobutton(opts_frame, text="الاسم الإنجليزي", variable=self.pdf_target_var, value="en").pack(side='right', padx=5)
         
         ttk.Button(self.controls_frame, text="استيراد كل الأسطر", style="Primary.TButton", 
-                   command=lambda: self.import_pdf_lines(text_widget.get("1.0", tk.END))).pack(fill='x')
+                   command=self.import_pdf_lines).pack(fill='x')
 
+    @traced("gui.db.show_excel_preview")
     def show_excel_preview(self, data):
         for widget in self.preview_frame.winfo_children(): widget.destroy()
         for widget in self.controls_frame.winfo_children(): widget.destroy()
@@ -247,41 +358,43 @@ class DatabaseEditorWindow:
         ttk.Radiobutton(opts_frame, text="الاسم الإنجليزي", variable=self.excel_target_var, value="en").pack(side='right', padx=5)
 
 
-    def import_pdf_lines(self, text):
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        if not lines: return
+    def import_pdf_lines(self):
+        if not self.current_file_path: return
         
         target = self.pdf_target_var.get()
-        count = 0
-        for line in lines:
-            if target == "ar":
-                success, _ = self.db.add_medication(line, "")
-            else:
-                success, _ = self.db.add_medication("", line)
-                
-            if success: count += 1
-            
-        messagebox.showinfo("تم الاستيراد", f"تم استيراد {count} عنصر بنجاح.")
-        self.refresh_list()
+        file_path = self.current_file_path
+        
+        # Runs on the import worker: stream lines page by page into the bulk insert
+        def pdf_lines(job):
+            for _, lines in self.importer.iter_pdf_pages(file_path, job.report_progress):
+                yield from lines
+        
+        self.import_names(pdf_lines, target)
 
     def import_excel_column(self, col_index):
         if not self.current_file_path: return
         
-        data, msg = self.importer.get_column_data(self.current_file_path, col_index)
+        target = self.excel_target_var.get()
+        file_path = self.current_file_path
         
-        if data is None:
-            messagebox.showerror("Error", msg)
-            return
+        # Runs on the import worker (parsing a big sheet takes a while)
+        def column_values(job):
+            data, msg = self.importer.get_column_data(file_path, col_index)
+            if data is None:
+                raise ValueError(msg)
+            job.set_total(len(data))
+            return data
         
-        target = self.excel_target_var.get()
-        count = 0
-        for item in data:
-            if target == "ar":
-                success, _ = self.db.add_medication(item, "")
-            else:
-                success, _ = self.db.add_medication("", item)
-                
-            if success: count += 1
-            
-        messagebox.showinfo("تم الاستيراد", f"تم استيراد {count} عنصر بنجاح.")
-        self.refresh_list()
+        self.import_names(column_values, target)
+
+    def import_names(self, source, target):
+        """
+        source(job) returns the names to import; it is called on the worker
+        thread so reading the file does not block the window.
+        """
+        def rows(job):
+            for name in source(job):
+                yield (name, "") if target == "ar" else ("", name)
+
+        job = ImportJob(self.db.db_name, rows).start()
+        ImportProgressDialog(self.window, job, self.refresh_list)
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from utils.importer import FileImporter
+from utils.tracing import traced
 import arabic_reshaper
 from bidi.algorithm import get_display
 
@@ -12,7 +13,7 @@ class ImportEditorWindow:
         
         self.config = config
         self.on_import = on_import_callback
-        self.importer = FileImporter()
+        self.importer = FileImporter(pdf_workers=config.get("pdf_workers", 0))
         self.mapped_data = {} # {field_id: value}
         
         self.current_file_type = None
@@ -100,6 +101,7 @@ class ImportEditorWindow:
             widget.destroy()
         ttk.Label(self.source_frame, text="الرجاء فتح ملف لعرض محتواه").pack(expand=True)
 
+    @traced("gui.import.open_file")
     def open_file(self):
         file_path = filedialog.askopenfilename(
             filetypes=[("All Supported", "*.pdf;*.xlsx;*.xls"), ("PDF Files", "*.pdf"), ("Excel Files", "*.xlsx;*.xls")]
@@ -111,17 +113,19 @@ class ImportEditorWindow:
         self.current_file_type = ftype
         
         if ftype == 'pdf':
-            text = self.importer.extract_text_from_pdf(file_path)
+            text = self.importer.extract_text_from_pdf(file_path, self.show_pdf_progress)
+            self.file_label.config(text=file_path)
             self.show_pdf_viewer(text)
         elif ftype == 'excel':
-            data = self.importer.extract_data_from_excel(file_path)
-            if isinstance(data, tuple): # Error
-                messagebox.showerror("Error", data[1])
-            else:
-                self.show_excel_viewer(data)
+            self.show_excel_viewer(file_path)
         else:
             messagebox.showerror("Error", "Unsupported file type")
 
+    def show_pdf_progress(self, done, total):
+        self.file_label.config(text=f"جاري قراءة الصفحات... {done}/{total}")
+        self.window.update_idletasks()
+
+    @traced("gui.import.show_pdf_viewer")
     def show_pdf_viewer(self, text):
         for widget in self.source_frame.winfo_children():
             widget.destroy()
@@ -133,11 +137,21 @@ class ImportEditorWindow:
         self.pdf_text_widget.tag_configure("rtl", justify='right')
         self.pdf_text_widget.insert("1.0", text, "rtl")
 
-    def show_excel_viewer(self, data):
+    @traced("gui.import.show_excel_viewer")
+    def show_excel_viewer(self, file_path):
         for widget in self.source_frame.winfo_children():
             widget.destroy()
+
+        # Stream the sheet: show the first chunk right away, add the rest in the background
+        chunks = self.importer.iter_excel_rows(file_path)
+        try:
+            first_chunk = next(chunks, None)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error reading Excel: {str(e)}")
+            return
             
-        if not data: return
+        if not first_chunk: return
+        data = [["" if v is None else v for v in row] for row in first_chunk]
 
         # Treeview
         columns = [str(i) for i in range(len(data[0]))]
@@ -164,11 +178,32 @@ class ImportEditorWindow:
             self.tree.column(col, width=100)
             
         # Data
-        for row in data[1:]:
+        self.insert_excel_rows(data[1:], len(columns))
+        self.window.after(1, self.load_more_excel_rows, self.tree, chunks, len(columns))
+
+    def insert_excel_rows(self, rows, column_count):
+        for row in rows:
             # Ensure row length matches columns
-            values = row + [''] * (len(columns) - len(row))
+            values = ["" if v is None else v for v in row]
+            values += [''] * (column_count - len(values))
             self.tree.insert('', tk.END, values=values)
 
+    @traced("gui.import.load_more_excel_rows")
+    def load_more_excel_rows(self, tree, chunks, column_count):
+        # Stop if another file was opened or the window was closed
+        if tree is not getattr(self, 'tree', None) or not tree.winfo_exists():
+            chunks.close()
+            return
+        try:
+            chunk = next(chunks, None)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error reading Excel: {str(e)}")
+            return
+        if chunk:
+            self.insert_excel_rows(chunk, column_count)
+            self.window.after(1, self.load_more_excel_rows, tree, chunks, column_count)
+
+    @traced("gui.import.paste_selection")
     def paste_selection(self, field_id):
         selected_text = ""
         
@@ -201,6 +236,7 @@ class ImportEditorWindow:
             # Just Replace
             self.field_vars[field_id].set(selected_text)
 
+    @traced("gui.import.finalize_import")
     def finalize_import(self):
         # Collect data
         result = {}
@@ -0,0 +1,79 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+from utils.tracing import tracer, SPAN_LOG, METRICS_FILE
+
+REFRESH_MS = 1000
+
+
+class MetricsWindow:
+    """
+    p50/p95 per traced operation (database, import, render, print, GUI
+    handlers), refreshed with after() while open. Also turns tracing on/off.
+    """
+
+    def __init__(self, parent, config):
+        self.window = tk.Toplevel(parent)
+        self.window.title("قياس الأداء")
+        self.window.geometry("700x450")
+        self.config = config
+        self.last_rows = None
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(fill='both', expand=True)
+
+        top = ttk.Frame(frame)
+        top.pack(fill='x', pady=(0, 10))
+        self.enabled_var = tk.BooleanVar(value=tracer.enabled)
+        ttk.Checkbutton(top, text="تفعيل القياس", variable=self.enabled_var, command=self.toggle).pack(side='right')
+        ttk.Button(top, text="تصفير", command=self.reset).pack(side='left')
+
+        self.files_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.files_var, anchor='e').pack(fill='x', side='bottom', pady=(10, 0))
+
+        columns = ("max", "p95", "p50", "errors", "count", "op")
+        self.tree = ttk.Treeview(frame, columns=columns, show='headings')
+        headings = {"op": "العملية", "count": "العدد", "errors": "أخطاء",
+                    "p50": "p50 (ms)", "p95": "p95 (ms)", "max": "الأقصى (ms)"}
+        widths = {"op": 240, "count": 70, "errors": 60, "p50": 90, "p95": 90, "max": 100}
+        for col in columns:
+            self.tree.heading(col, text=headings[col])
+            self.tree.column(col, width=widths[col], anchor='w' if col == "op" else 'e')
+
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='left', fill='y')
+        self.tree.pack(fill='both', expand=True)
+
+    def toggle(self):
+        self.config.set("tracing", self.enabled_var.get())
+        tracer.configure(self.config)
+        # RECEIPT_TRACE=1 keeps it on regardless of the setting
+        self.enabled_var.set(tracer.enabled)
+
+    def reset(self):
+        tracer.reset()
+        self.last_rows = None
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        rows = tracer.snapshot()
+        if rows != self.last_rows:
+            self.last_rows = rows
+            self.tree.delete(*self.tree.get_children())
+            for name, count, errors, p50, p95, max_ in rows:
+                self.tree.insert("", tk.END, values=(
+                    f"{max_ * 1000:.1f}", f"{p95 * 1000:.1f}", f"{p50 * 1000:.1f}", errors, count, name
+                ))
+
+        if tracer.enabled:
+            log_dir = os.path.abspath(tracer.log_dir)
+            self.files_var.set(f"{os.path.join(log_dir, SPAN_LOG)} | {os.path.join(log_dir, METRICS_FILE)}")
+        else:
+            self.files_var.set("القياس متوقف")
+        self.window.after(REFRESH_MS, self.refresh)
@@ -0,0 +1,101 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+from utils import print_queue
+
+STATUS_LABELS = {
+    print_queue.PENDING: "في الانتظار",
+    print_queue.PRINTING: "جاري الطباعة",
+    print_queue.DONE: "تمت الطباعة",
+    print_queue.FAILED: "فشلت",
+    print_queue.CANCELLED: "ملغاة",
+}
+
+REFRESH_MS = 1000
+
+
+class PrintQueueWindow:
+    """
+    Live view of the print queue: status, attempts and last error per job,
+    with retry/cancel. Refreshes itself with after() while open.
+    """
+
+    def __init__(self, parent, queue):
+        self.window = tk.Toplevel(parent)
+        self.window.title("طابور الطباعة")
+        self.window.geometry("700x400")
+        self.queue = queue
+        self.last_rows = None
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self.window, padding=10)
+        frame.pack(fill='both', expand=True)
+
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(fill='x', pady=(0, 10))
+        ttk.Button(btn_frame, text="إعادة المحاولة", style="Info.TButton", command=self.retry_selected).pack(side='right', padx=5)
+        ttk.Button(btn_frame, text="إلغاء", style="Danger.TButton", command=self.cancel_selected).pack(side='right', padx=5)
+        ttk.Button(btn_frame, text="مسح المنتهية", command=self.clear_finished).pack(side='left', padx=5)
+
+        self.summary_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.summary_var, anchor='e').pack(fill='x', side='bottom', pady=(10, 0))
+
+        columns = ("error", "updated", "attempts", "status", "id")
+        self.tree = ttk.Treeview(frame, columns=columns, show='headings')
+        headings = {"id": "#", "status": "الحالة", "attempts": "المحاولات", "updated": "آخر تحديث", "error": "آخر خطأ"}
+        widths = {"id": 60, "status": 100, "attempts": 80, "updated": 140, "error": 300}
+        for col in columns:
+            self.tree.heading(col, text=headings[col])
+            self.tree.column(col, width=widths[col], anchor='e')
+
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='left', fill='y')
+        self.tree.pack(fill='both', expand=True)
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        rows = self.queue.list_jobs()
+        # Only touch the tree when something changed (keeps the selection)
+        if rows != self.last_rows:
+            self.last_rows = rows
+            selected = self.tree.selection()
+            self.tree.delete(*self.tree.get_children())
+            for job_id, status, attempts, last_error, created_at, updated_at in rows:
+                updated = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M:%S")
+                self.tree.insert("", tk.END, iid=str(job_id),
+                                 values=(last_error or "", updated, attempts, STATUS_LABELS.get(status, status), job_id))
+            self.tree.selection_set([iid for iid in selected if self.tree.exists(iid)])
+
+            counts = self.queue.counts()
+            self.summary_var.set(
+                f"في الانتظار: {counts.get(print_queue.PENDING, 0)} | "
+                f"فشلت: {counts.get(print_queue.FAILED, 0)} | "
+                f"تمت: {counts.get(print_queue.DONE, 0)}"
+            )
+        self.window.after(REFRESH_MS, self.refresh)
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def retry_selected(self):
+        for job_id in self.selected_ids():
+            self.queue.retry(job_id)
+        self.last_rows = None
+
+    def cancel_selected(self):
+        ids = self.selected_ids()
+        if not ids:
+            return
+        cancelled = sum(1 for job_id in ids if self.queue.cancel(job_id))
+        if cancelled < len(ids):
+            messagebox.showwarning("تنبيه", "لا يمكن إلغاء المهام التي بدأت طباعتها أو انتهت.", parent=self.window)
+        self.last_rows = None
+
+    def clear_finished(self):
+        self.queue.clear_finished()
+        self.last_rows = None
@@ -0,0 +1,124 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+class VirtualListbox(ttk.Frame):
+    """
+    Listbox that only holds the rows currently visible.
+    Rows come from a pager (MedicationPager / ListPager) with a `total`
+    attribute and get_rows(start, count); the scrollbar maps to the
+    position in the whole result set and rows are fetched while scrolling.
+    """
+
+    def __init__(self, parent, format_row, font=("Segoe UI", 11), **kwargs):
+        super().__init__(parent)
+        self.format_row = format_row
+        self.pager = None
+        self.offset = 0       # absolute index of the first visible row
+        self.visible = 1      # rows that fit in the listbox
+        self.rows = []        # rows currently shown
+        self.selected = None  # absolute index of the selected row
+
+        self.line_height = tkfont.Font(font=font).metrics("linespace") + 1
+
+        self.scrollbar = ttk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.listbox = tk.Listbox(self, font=font, activestyle='none', selectmode=tk.SINGLE, **kwargs)
+        self.listbox.pack(fill='both', expand=True)
+
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.listbox.bind("<Up>", lambda e: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self.move_selection(-self.visible))
+        self.listbox.bind("<Next>", lambda e: self.move_selection(self.visible))
+
+    @property
+    def total(self):
+        return self.pager.total if self.pager else 0
+
+    def set_pager(self, pager, keep_position=False):
+        self.pager = pager
+        if not keep_position:
+            self.offset = 0
+        self.selected = None
+        self.render()
+
+    def render(self):
+        max_offset = max(0, self.total - self.visible)
+        self.offset = max(0, min(self.offset, max_offset))
+
+        self.rows = self.pager.get_rows(self.offset, self.visible) if self.pager else []
+        self.listbox.delete(0, tk.END)
+        if self.rows:
+            self.listbox.insert(tk.END, *[self.format_row(row) for row in self.rows])
+
+        if self.selected is not None and 0 <= self.selected - self.offset < len(self.rows):
+            self.listbox.selection_set(self.selected - self.offset)
+
+        if self.total:
+            first = self.offset / self.total
+            last = min(1.0, (self.offset + self.visible) / self.total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def on_resize(self, event):
+        visible = max(1, event.height // self.line_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def yview(self, *args):
+        # Scrollbar callback: ('moveto', fraction) or ('scroll', n, 'units'/'pages')
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self.total)
+            self.render()
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible
+            self.scroll_rows(step)
+
+    def scroll_rows(self, step):
+        self.offset += step
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        return self.scroll_rows(int(-1 * (event.delta / 120)) * 3)
+
+    def on_select(self, event=None):
+        idx = self.listbox.curselection()
+        if idx:
+            self.selected = self.offset + idx[0]
+
+    def move_selection(self, step):
+        if not self.total:
+            return "break"
+        current = self.selected if self.selected is not None else self.offset - 1
+        self.selected = max(0, min(self.total - 1, current + step))
+
+        # Keep the selection on screen
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + self.visible:
+            self.offset = self.selected - self.visible + 1
+        self.render()
+        self.listbox.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def get_selected_row(self):
+        if self.selected is None:
+            return None
+        if 0 <= self.selected - self.offset < len(self.rows):
+            return self.rows[self.selected - self.offset]
+        rows = self.pager.get_rows(self.selected, 1) if self.pager else []
+        return rows[0] if rows else None
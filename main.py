@@ -1,7 +1,10 @@
 import sys
 import os
+import re
+import hashlib
+import importlib.metadata
 import subprocess
-import tkinter as tk
+import multiprocessing
 
 # Redirect output if no console (for PyInstaller --noconsole)
 # This prevents crashes when "print" is called in a no-console environment
@@ -10,18 +13,150 @@ if sys.stdout is None:
 if sys.stderr is None:
     sys.stderr = open(os.devnull, 'w')
 
+# Remembers the requirements.txt (and Python) that were last verified
+STAMP_FILE = ".requirements.stamp"
+
+# Distributions only needed on some platforms: {name: os.name}
+PLATFORM_ONLY = {"pywin32": "nt"}
+
+REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?")
+SPECIFIER = re.compile(r"^\s*(~=|==|!=|<=|>=|<|>)\s*([^\s,;]+)\s*$")
+
+def read_requirements(requirements_file):
+    """[(name, requirement line, version specifier)] for this platform."""
+    requirements = []
+    with open(requirements_file, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            match = REQUIREMENT_NAME.match(line)
+            if not match:
+                continue
+            name = match.group(1)
+            if PLATFORM_ONLY.get(name.lower(), os.name) != os.name:
+                continue
+            specifier = line[match.end():].split(";", 1)[0].strip()
+            requirements.append((name, line, specifier))
+    return requirements
+
+def installed_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def version_key(version):
+    # Release numbers only ("4.2.5" -> (4, 2, 5), "6.0" == "6"); pre-release tags end it
+    parts = []
+    for part in version.split("+", 1)[0].split("."):
+        match = re.match(r"\d+", part)
+        if not match:
+            break
+        parts.append(int(match.group()))
+        if match.end() < len(part):
+            break
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+def satisfies(version, specifier):
+    """True when version meets every clause of a specifier such as ">=4.0,<6"."""
+    for clause in filter(None, (c.strip() for c in specifier.split(","))):
+        match = SPECIFIER.match(clause)
+        if not match:
+            continue  # not understood here; pip will judge it
+        op, wanted = match.groups()
+        if wanted.endswith(".*"):
+            prefix = wanted[:-2].split(".")
+            same = version.split(".")[:len(prefix)] == prefix
+            if (op == "==") != same:
+                return False
+            continue
+        have, want = version_key(version), version_key(wanted)
+        if op == "~=":
+            ok = have >= want and have[:len(want) - 1] == want[:-1]
+        else:
+            ok = {"==": have == want, "!=": have != want, "<=": have <= want,
+                  ">=": have >= want, "<": have < want, ">": have > want}[op]
+        if not ok:
+            return False
+    return True
+
+def requirements_stamp(requirements_file):
+    digest = hashlib.sha256()
+    with open(requirements_file, "rb") as f:
+        digest.update(f.read())
+    digest.update(f"\n{sys.executable}\n{sys.version}".encode("utf-8"))
+    return digest.hexdigest()
+
+def stamp_path(requirements_file):
+    return os.path.join(os.path.dirname(requirements_file), STAMP_FILE)
+
+def check_requirements(requirements_file):
+    """
+    Returns the requirement lines that are not installed or whose installed
+    version does not match (no pip, no network). When the stamp matches
+    requirements.txt and this Python, nothing is looked up at all; it is
+    only written after every requirement checked out.
+    """
+    stamp = requirements_stamp(requirements_file)
+    stamp_file = stamp_path(requirements_file)
+    try:
+        with open(stamp_file, encoding="utf-8") as f:
+            if f.read().strip() == stamp:
+                return []
+    except OSError:
+        pass
+
+    missing = []
+    for name, requirement, specifier in read_requirements(requirements_file):
+        version = installed_version(name)
+        if version is None or not satisfies(version, specifier):
+            missing.append(requirement)
+    if not missing:
+        try:
+            with open(stamp_file, "w", encoding="utf-8") as f:
+                f.write(stamp)
+        except OSError:
+            pass
+    return missing
+
+def forget_requirements_check(requirements_file):
+    # Something failed to import after all: check everything on the next start
+    try:
+        os.remove(stamp_path(requirements_file))
+    except OSError:
+        pass
+
 def install_requirements():
     """
-    Installs requirements.txt if running from source (not frozen).
+    Checks requirements.txt when running from source (not frozen) and
+    offers to pip install only what is missing or at the wrong version.
     """
     # Check if running as a PyInstaller bundle (frozen)
     if getattr(sys, 'frozen', False):
         return
 
-    requirements_file = os.path.join(os.path.dirname(__file__), "requirements.txt")
+    requirements_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "requirements.txt")
     if not os.path.exists(requirements_file):
         return
 
+    missing = check_requirements(requirements_file)
+    if not missing:
+        return
+
+    import tkinter as tk
+    from tkinter import messagebox
+
+    root = tk.Tk()
+    root.withdraw()
+    answer = messagebox.askyesno(
+        "مكتبات ناقصة",
+        "المكتبات التالية غير مثبتة أو بإصدار غير مناسب:\n" + "\n".join(missing) + "\n\nهل تريد تثبيتها الآن؟ (يتطلب اتصالاً بالإنترنت)"
+    )
+    root.destroy()
+    if not answer:
+        return
+
     try:
         # Configure startup info to hide console window during pip install
         startupinfo = None
@@ -30,27 +165,46 @@ def install_requirements():
             startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
             
         subprocess.check_call(
-            [sys.executable, "-m", "pip", "install", "-r", requirements_file, "--quiet"],
+            [sys.executable, "-m", "pip", "install", *missing, "--quiet"],
             startupinfo=startupinfo,
             stdout=open(os.devnull, 'w'),
             stderr=open(os.devnull, 'w')
         )
-    except Exception:
-        # Fail silently or log to file if needed
-        pass
+        check_requirements(requirements_file)
+    except Exception as e:
+        print(f"Error installing requirements: {e}")
+
+def report_startup(root):
+    # Startup benchmark: the first frame is on screen, report and quit
+    root.update()
+    print("STARTUP_READY", flush=True)
+    root.destroy()
 
 if __name__ == "__main__":
-    # Ensure dependencies are installed (dev mode only)
+    # Needed for the PDF extraction process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+
+    # Any arguments: run the command-line interface, no window
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main())
+
+    # Check dependencies (dev mode only); pip runs only if something is missing
     install_requirements()
 
     # Move imports here to ensure packages are available after install
     try:
         from gui import ReceiptApp
     except ImportError:
+        forget_requirements_check(os.path.join(os.path.dirname(os.path.abspath(__file__)), "requirements.txt"))
         # Fallback if install failed or something is wrong
         # We can try to show a message box using raw ctypes or basic tk
         pass
 
+    import tkinter as tk
+
     root = tk.Tk()
     app = ReceiptApp(root)
+    if os.environ.get("RECEIPT_STARTUP_BENCH"):
+        root.after_idle(report_startup, root)
     root.mainloop()
\ No newline at end of file
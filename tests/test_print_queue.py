@@ -0,0 +1,54 @@
+import copy
+import os
+import time
+
+from utils.config_manager import ConfigManager, DEFAULT_CONFIG
+from utils.printer import PDFGenerator
+from utils.print_backends import SpoolDirBackend, PrintBackend
+from utils.print_queue import PrintQueue, DONE, PENDING
+
+
+class FailingBackend(PrintBackend):
+    name = "failing"
+
+    def send(self, job_id, data):
+        raise OSError("printer offline")
+
+
+def make_generator():
+    # In-memory settings: nothing is written to config.json
+    return PDFGenerator(ConfigManager(config=copy.deepcopy(DEFAULT_CONFIG)))
+
+
+def job_row(queue, job_id):
+    return queue.get_connection().execute(
+        "SELECT status, attempts, last_error, next_attempt_at FROM print_jobs WHERE id = ?", (job_id,)
+    ).fetchone()
+
+
+def test_spool_backend_prints_job(tmp_path):
+    spool = tmp_path / "spool"
+    queue = PrintQueue(SpoolDirBackend(make_generator(), str(spool)), str(tmp_path / "queue.db"))
+
+    job_id = queue.enqueue({"customer_name": "محمد أحمد", "items": "Paracetamol 500mg", "total": "12"})
+    assert queue.run_pending() == 1
+
+    output = spool / f"receipt_{job_id:06d}.pdf"
+    assert output.read_bytes().startswith(b"%PDF")
+    assert os.listdir(spool) == [output.name]  # no temp files left behind
+    status, attempts, last_error, _ = job_row(queue, job_id)
+    assert (status, attempts, last_error) == (DONE, 1, None)
+
+
+def test_failed_job_is_retried_later(tmp_path):
+    queue = PrintQueue(FailingBackend(None), str(tmp_path / "queue.db"))
+
+    job_id = queue.enqueue({"total": "5"})
+    before = time.time()
+    assert queue.run_pending() == 0
+
+    status, attempts, last_error, next_attempt_at = job_row(queue, job_id)
+    assert (status, attempts, last_error) == (PENDING, 1, "printer offline")
+    assert next_attempt_at > before
+    # Not due yet: a second pass leaves it alone
+    assert queue.claim_next() is None
@@ -0,0 +1,54 @@
+from utils.printer_monitor import PrinterMonitor, StatusSource
+
+
+class FakeStatusSource(StatusSource):
+    """Answers from a dict; a printer mapped to an exception raises it."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def get_status(self, printer_name):
+        status = self.statuses[printer_name]
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+
+def monitor_with_events(source, printer_name=None):
+    events = []
+    monitor = PrinterMonitor(source, printer_name)
+    monitor.add_listener(events.append)
+    return monitor, events
+
+
+def test_first_check_publishes_without_printer():
+    monitor, events = monitor_with_events(FakeStatusSource({}))
+    monitor.check()
+    monitor.check()
+    assert [(e.printer, e.status, e.error) for e in events] == [("", None, None)]
+
+
+def test_publishes_only_on_change():
+    source = FakeStatusSource({"P1": "Ready"})
+    monitor, events = monitor_with_events(source, "P1")
+
+    monitor.check()
+    monitor.check()
+    source.statuses["P1"] = "Paper out"
+    monitor.check()
+    monitor.check()
+
+    assert [e.status for e in events] == ["Ready", "Paper out"]
+
+
+def test_error_keeps_last_status_and_backs_off():
+    source = FakeStatusSource({"P1": "Ready"})
+    monitor, events = monitor_with_events(source, "P1")
+
+    monitor.check()
+    source.statuses["P1"] = OSError("unreachable")
+    monitor.check()
+    monitor.check()
+
+    assert [(e.status, e.error) for e in events] == [("Ready", None), ("Ready", "unreachable")]
+    assert monitor.next_delay() > monitor.interval
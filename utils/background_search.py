@@ -0,0 +1,109 @@
+import queue
+import threading
+from .db_connection import connections
+
+
+class BackgroundSearch:
+    """
+    Runs searches for a Tk window on a worker thread.
+    Keystrokes are debounced, each request gets a generation number and
+    results from outdated generations are dropped. Results are delivered
+    on the Tk thread by polling with widget.after().
+    """
+
+    def __init__(self, widget, search_func, on_results, delay_ms=150, poll_ms=30):
+        self.widget = widget
+        self.search_func = search_func
+        self.on_results = on_results
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+
+        self.generation = 0     # newest request (Tk thread)
+        self.dispatched = 0     # newest request handed to the worker
+        self.closed = False
+        self._debounce_job = None
+        self._poll_job = None
+
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, query):
+        # Tk thread: restart the debounce window with the newest query
+        if self.closed:
+            return
+        self.generation += 1
+        if self._debounce_job is not None:
+            self.widget.after_cancel(self._debounce_job)
+        self._debounce_job = self.widget.after(self.delay_ms, self._dispatch, self.generation, query)
+
+    def _dispatch(self, generation, query):
+        self._debounce_job = None
+        self.dispatched = generation
+        self._requests.put((generation, query))
+        self._schedule_poll()
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+
+            # Skip straight to the newest queued request
+            while request is not None:
+                try:
+                    newer = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                request = newer
+
+            if request is None:
+                break
+
+            generation, query = request
+            if generation != self.generation:
+                continue  # superseded while waiting
+
+            try:
+                results = self.search_func(query)
+            except Exception as e:
+                print(f"Search error: {e}")
+                results = []
+            self._results.put((generation, results))
+
+        connections.close_thread_connections()
+
+    def _schedule_poll(self):
+        if self._poll_job is None and not self.closed:
+            self._poll_job = self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        if self.closed:
+            return
+
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+        if latest is not None and latest[0] == self.generation:
+            self.on_results(latest[1])
+            return
+
+        # Newest dispatched request still running
+        if latest is None or latest[0] < self.dispatched:
+            self._schedule_poll()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for job in (self._debounce_job, self._poll_job):
+            if job is not None:
+                try:
+                    self.widget.after_cancel(job)
+                except Exception:
+                    pass
+        self._requests.put(None)
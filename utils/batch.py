@@ -0,0 +1,206 @@
+import datetime
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .config_manager import ConfigManager
+from .importer import FileImporter
+from .printer import PDFGenerator
+
+# Receipts handed to a worker process per task
+BATCH_CHUNK = 50
+
+# Output modes
+SINGLE = "single"   # one multi-page PDF
+SPLIT = "split"     # one PDF per receipt
+
+# Set in every worker process by _init_worker
+_worker_generator = None
+
+
+def _init_worker(config_data):
+    global _worker_generator
+    _worker_generator = PDFGenerator(ConfigManager(config_data))
+
+
+def layout_chunk(rows):
+    """Worker: receipt bodies (shaped, positioned) for a chunk of data dicts."""
+    generator = _worker_generator
+    template = generator.get_template(generator.page_width())
+    return [template.build_body(data) for data in rows]
+
+
+def render_chunk(rows, out_dir, first_index):
+    """Worker: renders and writes receipt_<n>.pdf for every row; returns bytes written."""
+    written = 0
+    for i, data in enumerate(rows, start=first_index):
+        pdf = _worker_generator.render(data)
+        with open(os.path.join(out_dir, f"receipt_{i:05d}.pdf"), "wb") as f:
+            f.write(pdf)
+        written += len(pdf)
+    return written
+
+
+def format_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time(0):
+        return value.date().isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def map_columns(header, fields, mapping=None):
+    """
+    Column index for every enabled field: {field id: index}.
+    mapping ({field id: column name or index}) wins; otherwise a column
+    named like the field id or its label is used. Unmatched fields stay empty.
+    """
+    mapping = mapping or {}
+    names = [format_cell(name).lower() for name in header]
+    columns = {}
+    for field in fields:
+        if not field.get("enabled", True):
+            continue
+        fid = field["id"]
+        wanted = mapping.get(fid)
+        if isinstance(wanted, int) or (isinstance(wanted, str) and wanted.isdigit()):
+            columns[fid] = int(wanted)
+            continue
+        candidates = [wanted] if wanted else [fid, field.get("label", "")]
+        for name in candidates:
+            name = name.strip().lower()
+            if name in names:
+                columns[fid] = names.index(name)
+                break
+    return columns
+
+
+def open_receipts(importer, file_path, fields, mapping=None):
+    """
+    Reads the header row and returns (column map, generator of data dicts),
+    one dict per remaining spreadsheet row.
+    """
+    chunks = iter(importer.iter_excel_rows(file_path))
+    first = next(chunks, None)
+    if not first:
+        raise ValueError("The file is empty")
+    columns = map_columns(first[0], fields, mapping)
+    if not columns:
+        raise ValueError("No spreadsheet column matches a receipt field")
+
+    def rows():
+        for chunk in itertools.chain([first[1:]], chunks):
+            for row in chunk:
+                yield {fid: format_cell(row[i]) if i < len(row) else "" for fid, i in columns.items()}
+
+    return columns, rows()
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BatchResult:
+    def __init__(self, mode, output):
+        self.mode = mode
+        self.output = output
+        self.columns = {}
+        self.count = 0
+        self.bytes_written = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        size_mb = self.bytes_written / (1024 * 1024)
+        return (f"{self.count} receipts -> {self.output} ({self.mode}, {size_mb:.1f} MB) "
+                f"in {self.elapsed:.2f}s: {self.rate:,.1f} receipts/sec")
+
+
+def run_batch(config, file_path, output, mode=SINGLE, mapping=None, workers=None, progress_callback=None):
+    """
+    Renders one receipt per spreadsheet row.
+    SINGLE writes every receipt as a page of the PDF at output; SPLIT writes
+    receipt_<n>.pdf files into the output directory. Layout (or the whole
+    render, for SPLIT) runs in a process pool with `workers` processes
+    (None/0 = one per CPU, 1 = in this process).
+    progress_callback(receipts_done) is called after every chunk.
+    """
+    started = time.perf_counter()
+    result = BatchResult(mode, output)
+    workers = workers or os.cpu_count() or 1
+
+    # Resolve the font here so workers inherit it with the config snapshot
+    PDFGenerator(config).font()
+
+    result.columns, rows = open_receipts(FileImporter(), file_path, config.get_fields(), mapping)
+    chunks = chunked(rows, BATCH_CHUNK)
+
+    if mode == SPLIT:
+        os.makedirs(output, exist_ok=True)
+        results = _map_chunks(render_chunk, chunks, config, workers, output)
+        for count, written in results:
+            result.count += count
+            result.bytes_written += written
+            if progress_callback:
+                progress_callback(result.count)
+    else:
+        def bodies():
+            for count, chunk_bodies in _map_chunks(layout_chunk, chunks, config, workers):
+                yield from chunk_bodies
+                result.count += count
+                if progress_callback:
+                    progress_callback(result.count)
+
+        PDFGenerator(config).render_document(bodies(), output)
+        result.bytes_written = os.path.getsize(output)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _map_chunks(func, chunks, config, workers, out_dir=None):
+    # Yields (rows in chunk, func result) in input order
+    def args(chunk, first_index):
+        return (chunk, out_dir, first_index) if out_dir is not None else (chunk,)
+
+    if workers <= 1:
+        _init_worker(config.config)
+        index = 1
+        for chunk in chunks:
+            yield len(chunk), func(*args(chunk, index))
+            index += len(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config.config,)) as executor:
+        # A couple of chunks per worker in flight keeps memory flat on huge sheets
+        pending = deque()
+        index = 1
+        chunks = iter(chunks)
+        try:
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append((executor.submit(func, *args(chunk, index)), len(chunk)))
+                    index += len(chunk)
+                if not pending:
+                    break
+                future, count = pending.popleft()
+                yield count, future.result()
+        finally:
+            for future, _ in pending:
+                future.cancel()
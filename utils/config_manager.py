@@ -1,13 +1,32 @@
+import copy
 import json
 import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 
 CONFIG_FILE = "config.json"
 
+# Seconds between checks for changes written by other processes
+RELOAD_CHECK_INTERVAL = 1.0
+
 DEFAULT_CONFIG = {
     "printer_name": "",
     "paper_width": 80,
     "paper_height": 200,
     "auto_height": True,
+    "memory_search_index": False,
+    "fuzzy_search": True,
+    "pdf_workers": 0,
+    "print_backend": "shell",
+    "spool_dir": "spool",
+    "escpos_target": "file:receipt.bin",
+    "escpos_width_dots": 576,
+    "font_path": "",
+    "font_dirs": [],
+    "resolved_font": "",
+    "tracing": False,
     "fields": [
         {"id": "date", "label": "التاريخ", "type": "text", "enabled": True},
         {"id": "customer_name", "label": "اسم العميل", "type": "text", "enabled": True},
@@ -19,36 +38,155 @@ DEFAULT_CONFIG = {
 }
 
 class ConfigManager:
-    def __init__(self):
-        self.config = self.load_config()
+    """
+    Settings stored in config.json.
+    set() writes immediately unless inside `with config.batch():`, which
+    writes once at the end (or restores the old values on error). Writes go
+    through a temp file + rename, so the file is never half written.
+    Changes made by another process are picked up via the file's mtime.
+    subscribe(callback) -> callback(changed keys) after every save/reload.
+    """
+
+    def __init__(self, config=None, path=CONFIG_FILE):
+        # config: use this dict instead of reading a file (e.g. a snapshot in
+        # worker processes); such a manager never writes
+        self.path = path if config is None else None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._dirty = set()
+        self._batch_depth = 0
+        self._batch_snapshot = None
+        self._mtime = None
+        self._next_check = 0.0
+        self.config = config if config is not None else self.load_config()
 
     def load_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.save_config(DEFAULT_CONFIG)
-            return DEFAULT_CONFIG
+        if not os.path.exists(self.path):
+            self.save_config(copy.deepcopy(DEFAULT_CONFIG))
+            return self.config
         
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            self._mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception:
-            return DEFAULT_CONFIG
+            return copy.deepcopy(DEFAULT_CONFIG)
 
     def save_config(self, config=None):
-        if config:
-            self.config = config
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, ensure_ascii=False, indent=4)
+        with self._lock:
+            if config:
+                self.config = config
+            if self.path is None:
+                return
+
+            # Write a temp file next to config.json, then swap it in
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.config, f, ensure_ascii=False, indent=4)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._mtime = os.stat(self.path).st_mtime_ns
 
     def get(self, key, default=None):
+        self.reload_if_changed()
         return self.config.get(key, default)
 
     def set(self, key, value):
-        self.config[key] = value
-        self.save_config()
+        with self._lock:
+            current = self.config.get(key)
+            # The same list/dict object means the caller changed it in place
+            in_place = current is value and isinstance(value, (list, dict))
+            if key in self.config and current == value and not in_place:
+                return
+            self.config[key] = value
+            self._dirty.add(key)
+            if not self._batch_depth:
+                self.commit()
 
     def get_fields(self):
+        self.reload_if_changed()
         return self.config.get("fields", [])
 
     def set_fields(self, fields):
-        self.config["fields"] = fields
-        self.save_config()
+        self.set("fields", fields)
+
+    @contextmanager
+    def batch(self):
+        """Groups several set() calls into one write and one notification."""
+        with self._lock:
+            if not self._batch_depth:
+                self._batch_snapshot = copy.deepcopy(self.config)
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._batch_depth == 1:
+                    # Roll back everything set in this batch
+                    self.config = self._batch_snapshot
+                    self._dirty.clear()
+                raise
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._batch_snapshot = None
+            outermost = not self._batch_depth
+        if outermost and self._dirty:
+            self.commit()
+
+    @property
+    def dirty(self):
+        return bool(self._dirty)
+
+    def commit(self):
+        with self._lock:
+            changed = set(self._dirty)
+            self._dirty.clear()
+            self.save_config()
+        self.notify(changed)
+
+    def reload_if_changed(self, force=False):
+        """
+        Re-reads config.json when another process replaced it.
+        The file is stat-ed at most every RELOAD_CHECK_INTERVAL seconds.
+        """
+        if self.path is None or self._batch_depth:
+            return False
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + RELOAD_CHECK_INTERVAL
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            old = self.config
+            self.config = self.load_config()
+            changed = {key for key in set(old) | set(self.config) if old.get(key) != self.config.get(key)}
+        if changed:
+            self.notify(changed)
+        return bool(changed)
+
+    def subscribe(self, callback):
+        # callback(set of changed keys); runs on the thread that saved/reloaded
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(self, changed):
+        for callback in list(self._listeners):
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Config listener error: {e}")
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import threading
+
+# Connection tuning
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+CACHED_STATEMENTS = 256
+
+
+class ConnectionManager:
+    """
+    Process-wide SQLite connection layer.
+    Keeps one long-lived connection per (thread, database file), opened in
+    WAL mode with tuned pragmas, and runs schema setup once per database.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._initialized = {}  # {db path: result of the init function}
+
+    def resolve(self, db_name):
+        if db_name == ":memory:":
+            return db_name
+        return os.path.abspath(db_name)
+
+    def open_connection(self, path):
+        conn = sqlite3.connect(
+            path,
+            timeout=BUSY_TIMEOUT_MS / 1000.0,
+            cached_statements=CACHED_STATEMENTS
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        return conn
+
+    def get_connection(self, db_name):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+
+        path = self.resolve(db_name)
+        conn = conns.get(path)
+        if conn is None:
+            conn = self.open_connection(path)
+            conns[path] = conn
+        return conn
+
+    def run_once(self, db_name, init_func):
+        """
+        Runs init_func the first time a database is used in this process
+        and returns its (cached) result on every later call.
+        """
+        path = self.resolve(db_name)
+        with self._lock:
+            if path not in self._initialized:
+                self._initialized[path] = init_func()
+            return self._initialized[path]
+
+    def close_thread_connections(self):
+        # Call from worker threads before they exit
+        conns = getattr(self._local, "conns", None)
+        if not conns:
+            return
+        for conn in conns.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        conns.clear()
+
+
+connections = ConnectionManager()
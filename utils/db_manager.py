@@ -1,13 +1,47 @@
 import sqlite3
 import os
+import itertools
+from collections import OrderedDict
+from .db_connection import connections
+from . import search_index, fuzzy_index
+from .fuzzy_index import FUZZY_LIMIT
+from .tracing import traced
+
+# Max rows returned by search_medications (None = no limit)
+SEARCH_LIMIT = 200
+
+# Rows per transaction in add_medications_bulk
+BULK_CHUNK_SIZE = 5000
+
+# Rows per page when browsing the catalog
+PAGE_SIZE = 200
+
+# Trigram tokenizer can only match terms of at least 3 characters
+FTS_MIN_TERM = 3
+
+# Rows (in name order) a LIKE search reads before handing over to FTS.
+# Common words fill a page long before that; rare ones are cheaper in FTS,
+# which ranks every match and so is slow when there are many.
+LIKE_SCAN_ROWS = 20000
 
 class DatabaseManager:
-    def __init__(self, db_name="receipts.db"):
+    def __init__(self, db_name="receipts.db", use_index=False, fuzzy=True):
         self.db_name = db_name
-        self.init_db()
+        # Answer searches from the in-memory n-gram index (built on first search)
+        self.use_index = use_index
+        # Retry searches without hits with typo-tolerant matching
+        self.fuzzy = fuzzy
+        # Schema checks only run for the first manager on this database
+        self.fts_enabled = connections.run_once(db_name, self.init_db)
 
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
+        # Shared, long-lived connection for the current thread; do not close it
+        return connections.get_connection(self.db_name)
+
+    def loaded_indexes(self):
+        # In-memory indexes built for this database so far; writes keep them in sync
+        indexes = (search_index.get_index(self.db_name), fuzzy_index.get_index(self.db_name))
+        return [index for index in indexes if index is not None]
 
     def init_db(self):
         conn = self.get_connection()
@@ -39,10 +73,73 @@ class DatabaseManager:
                 # SQLite doesn't support DROP COLUMN easily in old versions, 
                 # but we can just ignore 'name' or rename table.
                 # For simplicity, we keep 'name' but stop using it, or copy and ignore.
+
+        self.init_unique_index(cursor)
+        fts_enabled = self.init_fts(cursor)
         
         conn.commit()
-        conn.close()
+        return fts_enabled
+
+    def init_unique_index(self, cursor):
+        cursor.execute("SELECT count(*) FROM sqlite_master WHERE type='index' AND name='idx_medications_names'")
+        if cursor.fetchone()[0]:
+            return
+
+        # Older databases may already hold duplicates: keep the first copy
+        cursor.execute('''
+            DELETE FROM medications WHERE id NOT IN (
+                SELECT MIN(id) FROM medications GROUP BY name_ar, name_en
+            )
+        ''')
+        cursor.execute("CREATE UNIQUE INDEX idx_medications_names ON medications(name_ar, name_en)")
 
+    def init_fts(self, cursor):
+        """
+        Creates the FTS5 (trigram) shadow index over medications and the
+        triggers keeping it in sync. Returns False if FTS5 is not available.
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE name IN ('medications_fts', 'medications_ai')")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS medications_fts USING fts5(
+                    name_ar, name_en,
+                    content='medications', content_rowid='id',
+                    tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 (or too old for trigram): the triggers
+            # would fail on every write, so drop them and use LIKE search.
+            for trigger in ('medications_ai', 'medications_ad', 'medications_au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            return False
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS medications_ai AFTER INSERT ON medications BEGIN
+                INSERT INTO medications_fts(rowid, name_ar, name_en) VALUES (new.id, new.name_ar, new.name_en);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS medications_ad AFTER DELETE ON medications BEGIN
+                INSERT INTO medications_fts(medications_fts, rowid, name_ar, name_en) VALUES ('delete', old.id, old.name_ar, old.name_en);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS medications_au AFTER UPDATE ON medications BEGIN
+                INSERT INTO medications_fts(medications_fts, rowid, name_ar, name_en) VALUES ('delete', old.id, old.name_ar, old.name_en);
+                INSERT INTO medications_fts(rowid, name_ar, name_en) VALUES (new.id, new.name_ar, new.name_en);
+            END
+        ''')
+
+        # New index (or triggers were missing for a while): index existing rows
+        if 'medications_fts' not in existing or 'medications_ai' not in existing:
+            cursor.execute("INSERT INTO medications_fts(medications_fts) VALUES ('rebuild')")
+
+        return True
+
+    @traced("db.add_medication")
     def add_medication(self, name_ar, name_en):
         name_ar = name_ar.strip() if name_ar else ""
         name_en = name_en.strip() if name_en else ""
@@ -52,46 +149,220 @@ class DatabaseManager:
         
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            # Check duplicates (simple check)
-            cursor.execute('SELECT id FROM medications WHERE name_ar = ? AND name_en = ?', (name_ar, name_en))
-            if cursor.fetchone():
-                 return False, "هذا الدواء موجود بالفعل"
-
-            cursor.execute('INSERT INTO medications (name_ar, name_en) VALUES (?, ?)', (name_ar, name_en))
-            conn.commit()
-            conn.close()
+            with conn:
+                # Duplicates are rejected by the unique (name_ar, name_en) index
+                cursor = conn.execute('INSERT INTO medications (name_ar, name_en) VALUES (?, ?)', (name_ar, name_en))
+
+            for index in self.loaded_indexes():
+                index.add(cursor.lastrowid, name_ar, name_en)
             return True, "تمت الإضافة بنجاح"
+        except sqlite3.IntegrityError:
+            return False, "هذا الدواء موجود بالفعل"
         except Exception as e:
             return False, str(e)
 
+    @traced("db.add_medications_bulk")
+    def add_medications_bulk(self, rows, chunk_size=BULK_CHUNK_SIZE, progress_callback=None, should_cancel=None):
+        """
+        Inserts many (name_ar, name_en) pairs, one transaction per chunk.
+        Rows without any name and duplicates are skipped.
+        progress_callback(processed, inserted, skipped) runs after every chunk;
+        when should_cancel() turns true the chunk in progress is rolled back
+        and the import stops (earlier chunks stay committed).
+        Returns (inserted, skipped).
+        """
+        inserted = 0
+        skipped = 0
+        processed = 0
+        conn = self.get_connection()
+        rows = iter(rows)
+
+        while not (should_cancel and should_cancel()):
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            clean = []
+            for name_ar, name_en in chunk:
+                name_ar = str(name_ar).strip() if name_ar else ""
+                name_en = str(name_en).strip() if name_en else ""
+                if name_ar or name_en:
+                    clean.append((name_ar, name_en))
+
+            added = 0
+            if clean:
+                last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM medications').fetchone()[0]
+
+                try:
+                    cursor = conn.executemany(
+                        'INSERT OR IGNORE INTO medications (name_ar, name_en) VALUES (?, ?)', clean
+                    )
+                    if should_cancel and should_cancel():
+                        conn.rollback()
+                        break
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+                # rowcount only counts rows actually inserted (not ignored ones)
+                added = cursor.rowcount
+
+                # Looked up after the commit: an index registered later reads these rows itself
+                indexes = self.loaded_indexes()
+                if indexes and added:
+                    # AUTOINCREMENT ids only grow, so new rows are the ones above last_id
+                    new_rows = conn.execute(
+                        'SELECT id, name_ar, name_en FROM medications WHERE id > ?', (last_id,)
+                    ).fetchall()
+                    for index in indexes:
+                        for med_id, name_ar, name_en in new_rows:
+                            index.add(med_id, name_ar, name_en)
+
+            processed += len(chunk)
+            inserted += added
+            skipped += len(chunk) - added
+
+            if progress_callback:
+                progress_callback(processed, inserted, skipped)
+
+        return inserted, skipped
+
+    @traced("db.delete_medication")
     def delete_medication(self, med_id):
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM medications WHERE id = ?', (med_id,))
-            conn.commit()
-            conn.close()
+            with conn:
+                conn.execute('DELETE FROM medications WHERE id = ?', (med_id,))
+
+            for index in self.loaded_indexes():
+                index.remove(med_id)
             return True, "تم الحذف بنجاح"
         except Exception as e:
             return False, str(e)
 
+    @traced("db.get_all_medications")
     def get_all_medications(self):
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, name_ar, name_en FROM medications ORDER BY name_ar, name_en')
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
+        return cursor.fetchall()
 
-    def search_medications(self, query):
+    @traced("db.count_medications")
+    def count_medications(self):
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        return conn.execute('SELECT count(*) FROM medications').fetchone()[0]
+
+    @traced("db.get_medications_page")
+    def get_medications_page(self, after=None, limit=PAGE_SIZE):
+        """
+        Keyset pagination over the catalog ordered by (name_ar, name_en, id).
+        after is the (name_ar, name_en, id) key of the last row already shown.
+        The unique (name_ar, name_en) index also carries the rowid, so it
+        covers both the ordering and the selected columns.
+        """
+        conn = self.get_connection()
+        if after is None:
+            cursor = conn.execute('''
+                SELECT id, name_ar, name_en FROM medications
+                ORDER BY name_ar, name_en, id
+                LIMIT ?
+            ''', (limit,))
+        else:
+            cursor = conn.execute('''
+                SELECT id, name_ar, name_en FROM medications
+                WHERE (name_ar, name_en, id) > (?, ?, ?)
+                ORDER BY name_ar, name_en, id
+                LIMIT ?
+            ''', (*after, limit))
+        return cursor.fetchall()
+
+    @traced("db.get_medication_key_at")
+    def get_medication_key_at(self, offset):
+        # Seek helper for jumps: walks the covering index only
+        conn = self.get_connection()
+        row = conn.execute('''
+            SELECT name_ar, name_en, id FROM medications
+            ORDER BY name_ar, name_en, id
+            LIMIT 1 OFFSET ?
+        ''', (offset,)).fetchone()
+        return row
+
+    @traced("db.search_medications")
+    def search_medications(self, query, limit=SEARCH_LIMIT):
         # Split query into words for token-based search
         words = query.strip().split()
         if not words:
             return []
+
+        if self.use_index:
+            results = search_index.load_index(self).search(query, limit)
+        # FTS needs at least one word long enough to produce a trigram
+        elif self.fts_enabled and any(len(w) >= FTS_MIN_TERM for w in words):
+            results = self.search_medications_like(words, limit, scan_rows=LIKE_SCAN_ROWS)
+            if results is None:
+                results = self.search_medications_fts(words, limit)
+        else:
+            results = self.search_medications_like(words, limit)
+
+        if not results and self.fuzzy:
+            # Nothing matches as typed: most likely a misspelled name
+            results = self.search_medications_fuzzy(query, limit)
+        return results
+
+    @traced("db.search_medications_fuzzy")
+    def search_medications_fuzzy(self, query, limit=FUZZY_LIMIT):
+        """
+        Typo-tolerant search: at most FUZZY_LIMIT rows, closest by edit
+        distance first. The index is built on first use, and only when the
+        query has a word it could correct.
+        """
+        if not fuzzy_index.correctable(query):
+            return []
+        limit = min(limit, FUZZY_LIMIT) if limit else FUZZY_LIMIT
+        return fuzzy_index.load_index(self).search(query, limit)
+
+    @traced("db.search_medications_fts")
+    def search_medications_fts(self, words, limit=SEARCH_LIMIT):
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        # Every long word becomes a quoted phrase (substring match with trigrams),
+        # short words are still filtered with LIKE on the matched rows.
+        terms = []
+        sql_parts = []
+        params = []
+        for word in words:
+            if len(word) >= FTS_MIN_TERM:
+                terms.append('"' + word.replace('"', '""') + '"')
+            else:
+                sql_parts.append("(m.name_ar LIKE ? OR m.name_en LIKE ?)")
+                param = f'%{word}%'
+                params.extend([param, param])
+
+        sql_where = " AND ".join(["medications_fts MATCH ?"] + sql_parts)
+
+        sql = f'''
+            SELECT m.id, m.name_ar, m.name_en
+            FROM medications_fts
+            JOIN medications m ON m.id = medications_fts.rowid
+            WHERE {sql_where}
+            ORDER BY bm25(medications_fts), m.name_ar
+            LIMIT ?
+        '''
+
+        cursor.execute(sql, [" AND ".join(terms)] + params + [limit if limit else -1])
+        return cursor.fetchall()
+
+    @traced("db.search_medications_like")
+    def search_medications_like(self, words, limit=SEARCH_LIMIT, scan_rows=None):
+        """
+        With scan_rows, only the first scan_rows rows (by name) are read;
+        returns None when they held fewer than limit matches and the table
+        has more rows, i.e. the answer may be incomplete.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
             
         # Build SQL dynamically: (name_ar LIKE ? OR name_en LIKE ?) AND (name_ar LIKE ? OR name_en LIKE ?) ...
         sql_parts = []
@@ -104,29 +375,113 @@ class DatabaseManager:
             
         sql_where = " AND ".join(sql_parts)
         
+        bound = None
+        if scan_rows:
+            # Key of the first row past the window; None when the whole table fits in it
+            cursor.execute(
+                "SELECT name_ar, name_en FROM medications ORDER BY name_ar, name_en LIMIT 1 OFFSET ?", (scan_rows,)
+            )
+            bound = cursor.fetchone()
+        if bound:
+            # A range on the (name_ar, name_en) index: the scan stops at the window's end
+            sql_where += " AND (name_ar, name_en) < (?, ?)"
+            params.extend(bound)
+
         sql = f'''
             SELECT id, name_ar, name_en 
             FROM medications 
             WHERE {sql_where} 
             ORDER BY name_ar
+            LIMIT ?
         '''
         
-        cursor.execute(sql, params)
+        cursor.execute(sql, params + [limit if limit else -1])
         rows = cursor.fetchall()
-        conn.close()
+        if bound and (not limit or len(rows) < limit):
+            return None
         return rows
 
+    @traced("db.clear_all_data")
     def clear_all_data(self):
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM medications")
-            try:
-                cursor.execute("DELETE FROM sqlite_sequence WHERE name='medications'")
-            except:
-                pass
-            conn.commit()
-            conn.close()
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM medications")
+                try:
+                    cursor.execute("DELETE FROM sqlite_sequence WHERE name='medications'")
+                except:
+                    pass
+
+            for index in self.loaded_indexes():
+                index.clear()
             return True, "تم مسح جميع البيانات بنجاح"
         except Exception as e:
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+
+
+def page_key(row):
+    # (id, name_ar, name_en) row -> keyset key
+    return (row[1], row[2], row[0])
+
+
+class MedicationPager:
+    """
+    Random access to the sorted catalog for virtualized lists.
+    Pages are fetched with keyset queries; OFFSET is only used to seek
+    when jumping to a page whose predecessor is unknown.
+    """
+
+    def __init__(self, db, page_size=PAGE_SIZE, max_pages=20):
+        self.db = db
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.total = db.count_medications()
+        self.pages = OrderedDict()  # {page number: rows} (LRU)
+        self.page_after = {0: None}  # {page number: key of the row before it}
+
+    def get_page(self, number):
+        rows = self.pages.get(number)
+        if rows is not None:
+            self.pages.move_to_end(number)
+            return rows
+
+        if number in self.page_after:
+            after = self.page_after[number]
+        else:
+            after = self.db.get_medication_key_at(number * self.page_size - 1)
+            if after is None:
+                return []
+
+        rows = self.db.get_medications_page(after, self.page_size)
+        if rows:
+            self.page_after[number + 1] = page_key(rows[-1])
+
+        self.pages[number] = rows
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return rows
+
+    def get_rows(self, start, count):
+        rows = []
+        number = start // self.page_size
+        skip = start % self.page_size
+        while len(rows) < count:
+            page = self.get_page(number)
+            if not page:
+                break
+            rows.extend(page[skip:skip + count - len(rows)])
+            skip = 0
+            number += 1
+        return rows
+
+
+class ListPager:
+    """Same interface as MedicationPager for rows already in memory (search results)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.total = len(rows)
+
+    def get_rows(self, start, count):
+        return self.rows[start:start + count]
@@ -0,0 +1,164 @@
+import os
+import socket
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+# Typical 80mm thermal head: 203 dpi, 72mm printable = 576 dots
+DEFAULT_WIDTH_DOTS = 576
+
+# Rows per GS v 0 command; some printers choke on very tall images
+BAND_HEIGHT = 256
+FEED_LINES = 4
+
+ESC_INIT = b"\x1b@"
+CUT = b"\x1dVB\x00"  # feed to the cutter, partial cut
+
+# PIL mode "1" stores white as 1, ESC/POS wants black as 1
+INVERT = bytes(255 - i for i in range(256))
+
+
+@lru_cache(maxsize=32)
+def load_font(path, size_px):
+    # BASIC layout: text is already shaped and in visual order
+    if path and os.path.exists(path):
+        try:
+            return ImageFont.truetype(path, size_px, layout_engine=ImageFont.Layout.BASIC)
+        except OSError:
+            pass
+    return ImageFont.load_default(size_px)
+
+
+def encode_raster(image):
+    """ESC/POS byte stream for a mode "1" image (width a multiple of 8)."""
+    width, height = image.size
+    row_bytes = width // 8
+    data = image.tobytes().translate(INVERT)
+
+    out = [ESC_INIT]
+    for top in range(0, height, BAND_HEIGHT):
+        rows = min(BAND_HEIGHT, height - top)
+        out.append(b"\x1dv0\x00" + bytes((row_bytes & 0xFF, row_bytes >> 8, rows & 0xFF, rows >> 8)))
+        out.append(data[top * row_bytes:(top + rows) * row_bytes])
+    out.append(b"\x1bd" + bytes((FEED_LINES,)))
+    out.append(CUT)
+    return b"".join(out)
+
+
+class RasterRenderer:
+    """
+    Draws a receipt layout as a 1-bit image at printer resolution.
+    The static header/footer blocks of a ReceiptTemplate are rasterized once
+    and pasted into every receipt; only the field lines are drawn per job.
+    """
+
+    def __init__(self, width_dots=DEFAULT_WIDTH_DOTS, font_path=None):
+        self.width_dots = width_dots - width_dots % 8
+        self.font_path = font_path
+        self._template = None
+        self._static = None  # (header image, footer image)
+
+    def scale(self, template):
+        return self.width_dots / float(template.width)
+
+    def static_images(self, template):
+        if self._template is not template:
+            scale = self.scale(template)
+            self._static = (
+                self.draw_block(template.header, scale),
+                self.draw_block(template.footer, scale),
+            )
+            self._template = template
+        return self._static
+
+    def draw_block(self, block, scale):
+        # Block height plus its margin, so descenders of the last line fit
+        height = max(1, int(round(block.height * scale)))
+        image = Image.new("1", (self.width_dots, height), 1)
+        for box in block.images:
+            self.draw_image(image, box, scale)
+        self.draw_lines(ImageDraw.Draw(image), block.lines, scale)
+        return image
+
+    def draw_image(self, image, box, scale):
+        try:
+            logo = Image.open(box.path)
+            if logo.mode in ("RGBA", "LA", "P"):
+                logo = logo.convert("RGBA")
+                background = Image.new("RGBA", logo.size, "white")
+                logo = Image.alpha_composite(background, logo)
+            size = (max(1, int(box.width * scale)), max(1, int(box.height * scale)))
+            # Dithered to 1 bit
+            logo = logo.convert("L").resize(size, Image.LANCZOS).convert("1")
+            image.paste(logo, (int(box.x * scale), int((box.y - box.height) * scale)))
+        except Exception as e:
+            print(f"Error drawing logo: {e}")
+
+    def draw_lines(self, draw, lines, scale):
+        for line in lines:
+            font = load_font(self.font_path, max(1, int(round(line.size * scale))))
+            y = line.y * scale
+            # Anchor on the aligned edge: raster font widths differ slightly from the PDF metrics
+            if line.align == "center":
+                draw.text(((line.x + line.width / 2) * scale, y), line.text, font=font, fill=0, anchor="ms")
+            else:
+                draw.text(((line.x + line.width) * scale, y), line.text, font=font, fill=0, anchor="rs")
+
+    def render(self, template, data):
+        body = template.build_body(data)
+        header, footer = self.static_images(template)
+        scale = self.scale(template)
+
+        footer_top = int(round(body.cursor * scale))
+        image = Image.new("1", (self.width_dots, footer_top + footer.size[1]), 1)
+        image.paste(header, (0, 0))
+        image.paste(footer, (0, footer_top))
+        self.draw_lines(ImageDraw.Draw(image), body.lines, scale)
+        return image
+
+
+class FileSink:
+    """Appends raw ESC/POS jobs to a file (capture/debugging)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+
+class DeviceSink:
+    """Printer device node or share, e.g. /dev/usb/lp0 or \\\\localhost\\Receipt."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, data):
+        with open(self.path, "wb", buffering=0) as f:
+            f.write(data)
+
+
+class TcpSink:
+    """Network printer on the raw port (JetDirect, 9100)."""
+
+    def __init__(self, host, port=9100, timeout=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def write(self, data):
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as sock:
+            sock.sendall(data)
+
+
+def create_sink(target):
+    """
+    "tcp://host[:port]" -> TcpSink, "file:path" -> FileSink,
+    anything else is opened as a device path.
+    """
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].partition(":")
+        return TcpSink(host, int(port) if port else 9100)
+    if target.startswith("file:"):
+        return FileSink(target[len("file:"):])
+    return DeviceSink(target)
@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import namedtuple
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Built-in fallback when no usable TTF is found (no Arabic glyphs!)
+FALLBACK_FONT = "Helvetica"
+
+# Tried in this order; all of them have Latin and Arabic presentation forms
+PREFERRED_FONTS = [
+    "arial.ttf", "tahoma.ttf", "segoeui.ttf",
+    "DejaVuSans.ttf", "FreeSans.ttf", "FreeSerif.ttf",
+    "NotoNaskhArabic-Regular.ttf", "NotoSansArabic-Regular.ttf", "Amiri-Regular.ttf",
+]
+
+# Alef (isolated presentation form, which is what the reshaper outputs) and Latin A
+REQUIRED_CHARS = (0xFE8D, 0x0627, 0x41)
+
+ResolvedFont = namedtuple("ResolvedFont", "name path")
+
+
+def system_font_dirs():
+    dirs = []
+    if os.name == "nt":
+        dirs.append(os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"))
+        local = os.environ.get("LOCALAPPDATA")
+        if local:
+            dirs.append(os.path.join(local, "Microsoft", "Windows", "Fonts"))
+    else:
+        home = os.path.expanduser("~")
+        dirs += [
+            os.path.join(home, ".local", "share", "fonts"), os.path.join(home, ".fonts"),
+            "/usr/local/share/fonts", "/usr/share/fonts",
+            "/Library/Fonts", "/System/Library/Fonts",
+        ]
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def find_font_files(dirs):
+    """{lower-case file name: path} for every .ttf below dirs (first one wins)."""
+    found = {}
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.lower().endswith(".ttf"):
+                    found.setdefault(name.lower(), os.path.join(root, name))
+    return found
+
+
+def font_name_for(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def supports_arabic(font):
+    char_to_glyph = font.face.charToGlyph
+    return all(ch in char_to_glyph for ch in REQUIRED_CHARS)
+
+
+class FontRegistry:
+    """
+    Finds an Arabic-capable TTF on first use and registers it with reportlab.
+    Search order: the configured font_path, the last resolved font, then
+    PREFERRED_FONTS in the configured font_dirs and the system font folders.
+    The result is written back to the config as "resolved_font", so later
+    startups parse that file first instead of scanning the font folders.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resolved = {}  # {configured path: ResolvedFont}
+
+    def candidates(self, config):
+        configured = config.get("font_path", "")
+        if configured:
+            yield configured
+        last = config.get("resolved_font", "")
+        if last:
+            yield last
+
+        found = find_font_files(list(config.get("font_dirs", [])) + system_font_dirs())
+        for name in PREFERRED_FONTS:
+            if name.lower() in found:
+                yield found[name.lower()]
+
+    def resolve(self, config):
+        key = config.get("font_path", "")
+        with self._lock:
+            resolved = self._resolved.get(key)
+            if resolved is None:
+                resolved = self._resolve(config)
+                self._resolved[key] = resolved
+        if resolved.path and config.get("resolved_font", "") != resolved.path:
+            config.set("resolved_font", resolved.path)
+        return resolved
+
+    def _resolve(self, config):
+        tried = set()
+        for path in self.candidates(config):
+            if path in tried or not os.path.isfile(path):
+                continue
+            tried.add(path)
+            name = font_name_for(path)
+            try:
+                font = TTFont(name, path)
+            except Exception as e:
+                print(f"Warning: Could not load font {path}: {e}")
+                continue
+            if not supports_arabic(font):
+                continue
+            pdfmetrics.registerFont(font)
+            return ResolvedFont(name, path)
+
+        print(f"Warning: No Arabic font found, using {FALLBACK_FONT}")
+        return ResolvedFont(FALLBACK_FONT, None)
+
+    def clear(self):
+        with self._lock:
+            self._resolved.clear()
+
+
+fonts = FontRegistry()
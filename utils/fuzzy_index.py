@@ -0,0 +1,266 @@
+import heapq
+import itertools
+import re
+import threading
+from array import array
+from .index_registry import IndexRegistry
+
+NGRAM = 3
+
+# Shorter query words are not corrected, only matched as substrings
+FUZZY_MIN_WORD = 4
+
+# Results returned by a fuzzy search
+FUZZY_LIMIT = 20
+
+# Upper bounds that keep a fuzzy search fast on huge catalogs, per query
+# word: vocabulary words looked at, words checked with edit distance
+# (those sharing the most trigrams), and rows ranked
+MAX_CANDIDATE_WORDS = 3000
+MAX_VERIFIED_WORDS = 300
+MAX_CANDIDATE_ROWS = 2000
+
+# Tashkeel (harakat, tatweel) is dropped and common spelling variants folded
+ARABIC_MARKS = re.compile(r'[\u0610-\u061A\u064B-\u065F\u0670\u0640]')
+ARABIC_FOLD = [("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"), ("ة", "ه"), ("ى", "ي"), ("ؤ", "و"), ("ئ", "ي")]
+
+# Numbers and codes ("#12", "500") are not worth correcting
+HAS_LETTER = re.compile(r'[^\W\d_]')
+
+
+def normalize(text):
+    text = (text or "").lower()
+    if text.isascii():
+        return text
+    text = ARABIC_MARKS.sub("", text)
+    for variant, letter in ARABIC_FOLD:
+        text = text.replace(variant, letter)
+    return text
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def correctable(query):
+    """True when the query has a word long enough for search() to correct."""
+    return any(len(word) >= FUZZY_MIN_WORD for word in tokenize(query))
+
+
+def index_words(name_ar, name_en):
+    # Distinct words of a row that go into the vocabulary
+    return {
+        word for word in tokenize(name_ar) + tokenize(name_en)
+        if len(word) >= NGRAM and HAS_LETTER.search(word)
+    }
+
+
+def word_grams(word):
+    # Padded at the start only, so prefixes of long names still share grams
+    padded = f" {word}"
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def max_distance(word):
+    # Typos allowed per word
+    return 1 if len(word) <= 5 else 2
+
+
+def prefix_distance(word, token, limit):
+    """
+    Smallest edit distance between word and any prefix of token (so a
+    half-typed name still matches), or None when it is above limit.
+    """
+    n = len(word)
+    over = limit + 1
+    # Only cells within `limit` of the diagonal can stay <= limit
+    previous = [i if i <= limit else over for i in range(n + 1)]
+    best = previous[n]
+    for j, ch in enumerate(token[:n + limit], start=1):
+        current = [j if j <= limit else over] + [over] * n
+        for i in range(max(1, j - limit), min(n, j + limit) + 1):
+            cost = previous[i - 1] + (word[i - 1] != ch)
+            if previous[i] + 1 < cost:
+                cost = previous[i] + 1
+            if current[i - 1] + 1 < cost:
+                cost = current[i - 1] + 1
+            current[i] = cost
+        if current[n] < best:
+            best = current[n]
+        if min(current) > limit:
+            break
+        previous = current
+    return best if best <= limit else None
+
+
+class FuzzyIndex:
+    """
+    Typo-tolerant search over the words of name_ar/name_en.
+    Every distinct word is indexed by its trigrams. A query word is only
+    compared (by edit distance) with vocabulary words sharing enough
+    trigrams with it, found through the rarest trigrams first.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.names = {}        # medication id -> (name_ar, name_en)
+            self.word_ids = {}     # word -> array of medication ids
+            self.gram_words = {}   # trigram -> list of words
+
+    def __len__(self):
+        return len(self.names)
+
+    def load(self, rows):
+        with self.lock:
+            self.clear()
+            names = self.names
+            word_ids = self.word_ids
+            for med_id, name_ar, name_en in rows:
+                names[med_id] = (name_ar or "", name_en or "")
+                for word in index_words(name_ar, name_en):
+                    ids = word_ids.get(word)
+                    if ids is None:
+                        ids = word_ids[word] = array('q')
+                    ids.append(med_id)
+            # Grams once per distinct word, not per row
+            gram_words = self.gram_words
+            for word in word_ids:
+                for gram in word_grams(word):
+                    words = gram_words.get(gram)
+                    if words is None:
+                        words = gram_words[gram] = []
+                    words.append(word)
+
+    def add(self, med_id, name_ar, name_en):
+        with self.lock:
+            if med_id in self.names:
+                self.remove(med_id)
+            self.names[med_id] = (name_ar or "", name_en or "")
+            for word in index_words(name_ar, name_en):
+                ids = self.word_ids.get(word)
+                if ids is None:
+                    ids = self.word_ids[word] = array('q')
+                    for gram in word_grams(word):
+                        self.gram_words.setdefault(gram, []).append(word)
+                ids.append(med_id)
+
+    def remove(self, med_id):
+        with self.lock:
+            names = self.names.pop(med_id, None)
+            if names is None:
+                return
+            for word in index_words(*names):
+                ids = self.word_ids.get(word)
+                if ids is None or med_id not in ids:
+                    continue
+                ids.remove(med_id)
+                if not ids:
+                    del self.word_ids[word]
+                    for gram in word_grams(word):
+                        words = self.gram_words.get(gram)
+                        if words is not None and word in words:
+                            words.remove(word)
+                            if not words:
+                                del self.gram_words[gram]
+
+    def match_word(self, word):
+        """
+        {vocabulary word: score} for words within max_distance(word); the
+        score is the edit distance, ties going to words about as long as
+        the one typed.
+        """
+        limit = max_distance(word)
+        grams = word_grams(word)
+        # One edit changes at most NGRAM trigrams
+        needed = max(1, len(grams) - NGRAM * limit)
+
+        # Any word sharing `needed` grams must appear in one of the
+        # len(grams) - needed + 1 rarest posting lists
+        postings = sorted((self.gram_words.get(gram, ()) for gram in grams), key=len)
+        candidates = set()
+        for words in postings[:len(grams) - needed + 1]:
+            candidates.update(words)
+            if len(candidates) >= MAX_CANDIDATE_WORDS:
+                break
+
+        shared = []
+        for candidate in candidates:
+            if len(candidate) >= len(word) - limit:
+                count = len(grams & word_grams(candidate))
+                if count >= needed:
+                    shared.append((-count, candidate))
+
+        matches = {}
+        for _, candidate in heapq.nsmallest(MAX_VERIFIED_WORDS, shared):
+            distance = prefix_distance(word, candidate, limit)
+            if distance is not None:
+                matches[candidate] = distance + min(abs(len(candidate) - len(word)), 9) / 100
+        return matches
+
+    def search(self, query, limit=FUZZY_LIMIT):
+        """
+        Rows whose names contain a close match for every query word, best
+        first: (id, name_ar, name_en), ranked by total edit distance.
+        Words shorter than FUZZY_MIN_WORD must appear as typed.
+        """
+        words = tokenize(query)
+        long_words = [w for w in words if len(w) >= FUZZY_MIN_WORD]
+        short_words = [w for w in words if len(w) < FUZZY_MIN_WORD]
+        if not long_words:
+            return []
+
+        with self.lock:
+            matches = [self.match_word(word) for word in long_words]
+            if not all(matches):
+                return []
+
+            # Rows come from the word with the fewest matching rows, closest words first
+            def row_count(found):
+                return sum(len(self.word_ids[w]) for w in found)
+
+            matches.sort(key=row_count)
+            first, others = matches[0], matches[1:]
+
+            scores = {}
+            for word in sorted(first, key=first.get):
+                if len(scores) >= MAX_CANDIDATE_ROWS:
+                    break
+                score = first[word]
+                for med_id in itertools.islice(self.word_ids[word], MAX_CANDIDATE_ROWS - len(scores)):
+                    if med_id not in scores:
+                        scores[med_id] = score
+
+            ranked = []
+            for med_id, score in scores.items():
+                name_ar, name_en = self.names[med_id]
+                key = f"{normalize(name_ar)}\n{normalize(name_en)}"
+                if not all(w in key for w in short_words):
+                    continue
+                row_words = key.split()
+                for found in others:
+                    best = min((found[w] for w in row_words if w in found), default=None)
+                    if best is None:
+                        break
+                    score += best
+                else:
+                    ranked.append((score, name_ar, name_en, med_id))
+
+            top = heapq.nsmallest(limit or FUZZY_LIMIT, ranked)
+            return [(med_id, name_ar, name_en) for _, name_ar, name_en, med_id in top]
+
+
+# Process-wide indexes, one per database file
+registry = IndexRegistry(FuzzyIndex)
+get_index = registry.get
+load_index = registry.load
+drop_index = registry.drop
+
+
+def warm_index(db_manager):
+    """Builds the index on a background thread, so the first fuzzy search does not wait."""
+    if get_index(db_manager.db_name) is None:
+        threading.Thread(target=load_index, args=(db_manager,), name="fuzzy-index", daemon=True).start()
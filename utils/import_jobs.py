@@ -0,0 +1,104 @@
+import threading
+import time
+from .db_manager import DatabaseManager
+from .db_connection import connections
+
+# Rows per transaction for background imports (also the cancel granularity)
+IMPORT_CHUNK_SIZE = 2000
+
+
+class ImportJob:
+    """
+    Bulk medication import running on a worker thread.
+    rows is an iterable of (name_ar, name_en) pairs, or a callable taking the
+    job and returning one. Either way it is consumed on the worker, so slow
+    sources (PDF pages, spreadsheet parsing) stay off the Tk thread.
+    Progress fields are read by the UI while the job runs.
+    """
+
+    def __init__(self, db_name, rows, total=None, chunk_size=IMPORT_CHUNK_SIZE):
+        self.db_name = db_name
+        self.rows = rows
+        self.chunk_size = chunk_size
+
+        self.total = total          # expected rows, if known
+        self.units_done = 0         # optional source progress (e.g. PDF pages)
+        self.units_total = 0
+        self.processed = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def set_total(self, total):
+        self.total = total
+
+    def report_progress(self, done, total):
+        # Source-level progress, e.g. pages read out of page count
+        self.units_done = done
+        self.units_total = total
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def fraction(self):
+        # None when the amount of work is unknown
+        if self.units_total:
+            return min(1.0, self.units_done / self.units_total)
+        if self.total:
+            return min(1.0, self.processed / self.total)
+        return None
+
+    def eta(self):
+        fraction = self.fraction()
+        if not fraction:
+            return None
+        return self.elapsed() * (1 - fraction) / fraction
+
+    def _on_chunk(self, processed, inserted, skipped):
+        self.processed = processed
+        self.inserted = inserted
+        self.skipped = skipped
+
+    def _run(self):
+        try:
+            db = DatabaseManager(self.db_name)
+            rows = self.rows(self) if callable(self.rows) else self.rows
+            db.add_medications_bulk(
+                rows,
+                chunk_size=self.chunk_size,
+                progress_callback=self._on_chunk,
+                should_cancel=self._cancel.is_set
+            )
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            connections.close_thread_connections()
+            self.finished_at = time.monotonic()
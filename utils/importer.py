@@ -1,51 +1,253 @@
-import pandas as pd
-import pdfplumber
 import os
+import itertools
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from .tracing import traced
+
+# Rows per chunk when streaming spreadsheets
+EXCEL_CHUNK_ROWS = 1000
+
+# Data rows shown in spreadsheet previews
+PREVIEW_ROWS = 500
+
+# Parsed workbooks kept in memory: {(path, mtime, size): rows}
+WORKBOOK_CACHE_SIZE = 2
+_workbook_cache = OrderedDict()
+
+# Pages shown in PDF previews
+PDF_PREVIEW_PAGES = 5
+
+# PDFs with fewer pages are always read serially
+PARALLEL_MIN_PAGES = 24
+
+# Minimum pages handled by one worker task
+PDF_PAGES_PER_TASK = 8
+
+# pandas, openpyxl and pdfplumber are imported where they are used: they
+# take about a second to load and most callers need only one of them
+
+def extract_page_range(file_path, start, end):
+    """
+    Worker process entry: opens the PDF itself and returns the text of
+    pages [start, end).
+    """
+    import pdfplumber
+
+    texts = []
+    with pdfplumber.open(file_path) as pdf:
+        for i in range(start, end):
+            page = pdf.pages[i]
+            texts.append(page.extract_text() or "")
+            page.close()
+    return texts
 
 class FileImporter:
-    def __init__(self):
-        pass
+    def __init__(self, pdf_workers=None):
+        # Processes used for PDF text extraction (None/0 = one per CPU, 1 = serial)
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
 
-    def extract_text_from_pdf(self, file_path):
+    @traced("importer.extract_text_from_pdf")
+    def extract_text_from_pdf(self, file_path, progress_callback=None):
         """
         Extracts text from a PDF file.
-        Returns a string containing the text of the first page (or all pages).
+        Returns a string containing the text of all pages.
+        progress_callback(pages_done, page_count) is called as pages complete.
         """
-        text_content = ""
         try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    text_content += page.extract_text() + "\n\n"
+            pages = list(self.iter_pdf_page_texts(file_path, progress_callback))
         except Exception as e:
             return f"Error reading PDF: {str(e)}"
         
-        return text_content
+        return "".join(page_text + "\n\n" for page_text in pages)
 
-    def extract_data_from_excel(self, file_path):
+    @traced("importer.preview_text_from_pdf")
+    def preview_text_from_pdf(self, file_path, max_pages=PDF_PREVIEW_PAGES):
+        """
+        Returns the text of the first max_pages pages only.
+        """
+        pages = self.iter_pdf_pages(file_path, parallel=False)
+        try:
+            parts = ["\n".join(lines) for _, lines in itertools.islice(pages, max_pages)]
+        except Exception as e:
+            return f"Error reading PDF: {str(e)}"
+        finally:
+            pages.close()
+
+        return "\n\n".join(parts)
+
+    @traced("importer.iter_pdf_pages")
+    def iter_pdf_pages(self, file_path, progress_callback=None, parallel=True):
+        """
+        Lazily yields (page_no, lines) for every page, page_no starting at 1.
+        lines are the stripped, non-empty text lines of the page.
+        """
+        pages = self.iter_pdf_page_texts(file_path, progress_callback, parallel)
+        for page_no, page_text in enumerate(pages, start=1):
+            lines = [line.strip() for line in page_text.split('\n') if line.strip()]
+            yield page_no, lines
+
+    def iter_pdf_page_texts(self, file_path, progress_callback=None, parallel=True):
+        """
+        Yields the text of every page in order. Large files are split into
+        page ranges extracted in parallel by a process pool.
+        """
+        import pdfplumber
+
+        with pdfplumber.open(file_path) as pdf:
+            page_count = len(pdf.pages)
+
+            if not parallel or self.pdf_workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+                for i, page in enumerate(pdf.pages):
+                    text = page.extract_text() or ""
+                    # Drop the parsed layout so memory stays flat on long files
+                    page.close()
+                    yield text
+                    if progress_callback:
+                        progress_callback(i + 1, page_count)
+                return
+
+        # Every task reopens the file, so keep tasks to a few per worker
+        per_task = max(PDF_PAGES_PER_TASK, -(-page_count // (self.pdf_workers * 4)))
+        ranges = deque(
+            (start, min(start + per_task, page_count))
+            for start in range(0, page_count, per_task)
+        )
+        workers = min(self.pdf_workers, len(ranges))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Only a couple of ranges per worker in flight, so finished text
+            # never piles up faster than the consumer reads it
+            pending = deque()
+            try:
+                while ranges or pending:
+                    while ranges and len(pending) < workers * 2:
+                        start, end = ranges.popleft()
+                        pending.append((executor.submit(extract_page_range, file_path, start, end), end))
+
+                    future, end = pending.popleft()
+                    for page_text in future.result():
+                        yield page_text
+                    if progress_callback:
+                        progress_callback(end, page_count)
+            finally:
+                for future, _ in pending:
+                    future.cancel()
+
+    def workbook_key(self, file_path):
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+    @traced("importer.iter_excel_rows")
+    def iter_excel_rows(self, file_path, chunk_size=EXCEL_CHUNK_ROWS):
+        """
+        Yields the first sheet as chunks of row tuples, header row first.
+        An unchanged file is served from the parsed-workbook cache; otherwise
+        it is streamed and cached once it has been read to the end.
+        """
+        key = self.workbook_key(file_path)
+        rows = _workbook_cache.get(key)
+        if rows is not None:
+            _workbook_cache.move_to_end(key)
+            for i in range(0, len(rows), chunk_size):
+                yield rows[i:i + chunk_size]
+            return
+
+        parsed = []
+        for chunk in self.stream_excel_rows(file_path, chunk_size):
+            parsed.extend(chunk)
+            yield chunk
+
+        _workbook_cache[key] = parsed
+        while len(_workbook_cache) > WORKBOOK_CACHE_SIZE:
+            _workbook_cache.popitem(last=False)
+
+    def stream_excel_rows(self, file_path, chunk_size=EXCEL_CHUNK_ROWS):
+        _, ext = os.path.splitext(file_path)
+        ext = ext.lower()
+
+        if ext in ('.csv', '.xls'):
+            import pandas as pd
+        else:
+            import openpyxl
+
+        if ext == '.csv':
+            for df in pd.read_csv(file_path, header=None, chunksize=chunk_size):
+                yield self.frame_rows(df)
+            return
+
+        if ext == '.xls':
+            # Legacy format has no streaming reader
+            df = pd.read_excel(file_path, header=None)
+            rows = self.frame_rows(df)
+            for i in range(0, len(rows), chunk_size):
+                yield rows[i:i + chunk_size]
+            return
+
+        # .xlsx: openpyxl read-only mode parses the sheet row by row
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            chunk = []
+            for row in wb.active.iter_rows(values_only=True):
+                if all(v is None for v in row):
+                    continue
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            wb.close()
+
+    def frame_rows(self, df):
+        # DataFrame -> row tuples with None for empty cells
+        df = df.astype(object).where(df.notna(), None)
+        return list(df.itertuples(index=False, name=None))
+
+    @traced("importer.extract_data_from_excel")
+    def extract_data_from_excel(self, file_path, max_rows=None):
         """
         Reads an Excel file and returns a list of lists (rows).
+        The first row is the header; max_rows limits the data rows (preview).
         """
         try:
-            df = pd.read_excel(file_path)
+            rows = []
+            for chunk in self.iter_excel_rows(file_path):
+                rows.extend(chunk)
+                if max_rows is not None and len(rows) > max_rows:
+                    rows = rows[:max_rows + 1]
+                    break
+            if not rows:
+                return None, "Error reading Excel: empty sheet"
+
             # Convert to list of lists, including header
-            headers = df.columns.tolist()
-            values = df.values.tolist()
-            return [headers] + values
+            return [["" if v is None else v for v in row] for row in rows]
         except Exception as e:
             return None, f"Error reading Excel: {str(e)}"
 
+    @traced("importer.get_column_data")
     def get_column_data(self, file_path, column_index):
         """
         Returns a list of values from a specific column (0-based index) in an Excel file.
         Skips the header row.
         """
         try:
-            df = pd.read_excel(file_path)
-            if column_index < 0 or column_index >= len(df.columns):
+            column_data = []
+            header = None
+            for chunk in self.iter_excel_rows(file_path):
+                if header is None:
+                    header, chunk = chunk[0], chunk[1:]
+                    if column_index < 0 or column_index >= len(header):
+                        return None, "Column index out of range"
+
+                for row in chunk:
+                    if column_index < len(row):
+                        value = row[column_index]
+                        if value is not None and value != "":
+                            column_data.append(str(value))
+
+            if header is None:
                 return None, "Column index out of range"
-            
-            # Select column by integer location
-            column_data = df.iloc[:, column_index].dropna().astype(str).tolist()
             return column_data, None
         except Exception as e:
             return None, f"Error reading Excel column: {str(e)}"
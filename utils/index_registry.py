@@ -0,0 +1,50 @@
+import threading
+from .db_connection import connections
+
+
+class IndexRegistry:
+    """
+    Process-wide in-memory indexes of one kind, one per database file.
+    index_class() must build an empty index with an RLock `lock` and a
+    load(rows) method taking (id, name_ar, name_en) rows.
+    """
+
+    def __init__(self, index_class):
+        self.index_class = index_class
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, db_name):
+        """
+        Returns the index for a database, or None. An index still loading is
+        returned too: its lock makes writers and searches wait for the load.
+        """
+        with self._lock:
+            return self._indexes.get(connections.resolve(db_name))
+
+    def load(self, db_manager):
+        """Builds (once) and returns the index for a DatabaseManager's database."""
+        path = connections.resolve(db_manager.db_name)
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is not None:
+                return index
+            index = self.index_class()
+            # Registered (and locked) before the rows are read: a write committed
+            # after the snapshot finds the index and is applied once the load ends
+            index.lock.acquire()
+            self._indexes[path] = index
+        try:
+            index.load(db_manager.get_all_medications())
+        except Exception:
+            with self._lock:
+                if self._indexes.get(path) is index:
+                    del self._indexes[path]
+            raise
+        finally:
+            index.lock.release()
+        return index
+
+    def drop(self, db_name):
+        with self._lock:
+            self._indexes.pop(connections.resolve(db_name), None)
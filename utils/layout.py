@@ -0,0 +1,141 @@
+import os
+from collections import namedtuple
+from functools import lru_cache
+from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit, ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from .text_utils import fix_text, fix_lines
+
+# Vertical spacing (points)
+LINE_GAP = 5                  # added to the font size for every text line
+LOGO_MAX_SIZE = 3.0 * cm
+LOGO_SPACING = 0.5 * cm       # below the logo
+HEADER_SPACING = 0.5 * cm     # below the header
+FIELD_SPACING = 0.3 * cm      # below every field
+FOOTER_SPACING = 0.5 * cm     # above the footer
+
+# Wrapped + shaped paragraphs kept in memory
+WRAP_CACHE_SIZE = 2048
+
+# A shaped text line: x is the left edge, y the baseline measured from the top of the page
+LineBox = namedtuple("LineBox", "text x y font size width align")
+
+# y is the bottom edge of the image measured from the top of the page
+ImageBox = namedtuple("ImageBox", "path x y width height")
+
+
+@lru_cache(maxsize=WRAP_CACHE_SIZE)
+def wrap_text(text, font, size, width):
+    """
+    Wraps a paragraph and shapes every line once.
+    Returns a tuple of (shaped line, line width).
+    """
+    lines = simpleSplit(text, font, size, width)
+    return tuple((shaped, stringWidth(shaped, font, size)) for shaped in fix_lines(lines))
+
+
+@lru_cache(maxsize=16)
+def image_size(path, mtime):
+    # mtime is part of the key so a replaced logo is measured again
+    return ImageReader(path).getSize()
+
+
+class ReceiptLayout:
+    """
+    Positioned, pre-shaped content of one receipt.
+    Produced once per receipt and consumed both for the page height and
+    for drawing (PDF or raster).
+    """
+
+    def __init__(self, width, margin):
+        self.width = width
+        self.margin = margin
+        self.lines = []     # LineBox
+        self.images = []    # ImageBox
+        self.cursor = margin  # distance from the top of the page
+
+    @property
+    def height(self):
+        # Content plus the bottom margin
+        return self.cursor + self.margin
+
+    def add_paragraph(self, text, font, size, align):
+        text_width = self.width - 2 * self.margin
+        for shaped, line_width in wrap_text(text, font, size, text_width):
+            self.cursor += size + LINE_GAP
+            self.add_line(shaped, font, size, line_width, align, self.cursor)
+
+    def add_line(self, shaped, font, size, line_width, align, y):
+        if align == "center":
+            x = (self.width - line_width) / 2
+        else:
+            # RTL: right aligned
+            x = self.width - self.margin - line_width
+        self.lines.append(LineBox(shaped, x, y, font, size, line_width, align))
+
+    def add_logo(self, path):
+        img_w, img_h = image_size(path, os.path.getmtime(path))
+
+        # Scale to max width/height of 3cm
+        aspect = img_h / float(img_w)
+        if img_w > img_h:
+            draw_w = min(self.width - 2 * self.margin, LOGO_MAX_SIZE)
+            draw_h = draw_w * aspect
+        else:
+            draw_h = LOGO_MAX_SIZE
+            draw_w = draw_h / aspect
+
+        # Center
+        x_pos = (self.width - draw_w) / 2
+        self.images.append(ImageBox(path, x_pos, self.cursor + draw_h, draw_w, draw_h))
+        self.cursor += draw_h + LOGO_SPACING
+
+
+def build_header(config, width, font, header_size, margin, logo_path=None):
+    """Logo and header text; the same for every receipt of a configuration."""
+    layout = ReceiptLayout(width, margin)
+
+    # Logo
+    if logo_path:
+        try:
+            layout.add_logo(logo_path)
+        except Exception as e:
+            print(f"Error drawing logo: {e}")
+
+    # Header (centered)
+    header = config.get("header_text", "")
+    if header:
+        layout.add_paragraph(header, font, header_size, "center")
+        layout.cursor += HEADER_SPACING
+
+    return layout
+
+
+def add_fields(layout, config, data, font, body_size):
+    # Fields: label on its own line, value wrapped below (right aligned)
+    for field in config.get_fields():
+        if not field.get("enabled", True):
+            continue
+
+        label_text = fix_text(field["label"] + ":")
+        layout.add_line(label_text, font, body_size, stringWidth(label_text, font, body_size),
+                        "right", layout.cursor + body_size)
+        layout.cursor += body_size + LINE_GAP
+
+        value = data.get(field["id"], "")
+        layout.add_paragraph("" if value is None else str(value), font, body_size, "right")
+        layout.cursor += FIELD_SPACING
+
+
+def build_footer(config, width, font, body_size, margin):
+    """Footer text, positioned from the top of the footer block."""
+    layout = ReceiptLayout(width, margin)
+    layout.cursor = 0
+
+    # Footer (centered)
+    footer = config.get("footer_text", "")
+    if footer:
+        layout.cursor += FOOTER_SPACING
+        layout.add_paragraph(footer, font, body_size, "center")
+
+    return layout
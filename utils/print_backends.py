@@ -0,0 +1,108 @@
+import os
+import tempfile
+from .escpos import RasterRenderer, encode_raster, create_sink, DEFAULT_WIDTH_DOTS
+from .tracing import traced
+
+# Default folder for the spool-directory backend (relative to the working directory)
+DEFAULT_SPOOL_DIR = "spool"
+
+
+class PrintBackend:
+    """
+    Delivers one rendered receipt to its destination.
+    send() raises on failure; the print queue records the error and retries.
+    """
+
+    name = "base"
+
+    def __init__(self, generator):
+        self.generator = generator  # PDFGenerator
+
+    def send(self, job_id, data):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ShellPrintBackend(PrintBackend):
+    """PDF handed to the Windows shell "print"/"printto" verb."""
+
+    name = "shell"
+
+    def send(self, job_id, data):
+        path = self.generator.spill(self.generator.render(data))
+        self.generator.shell_print(path)
+
+
+class SpoolDirBackend(PrintBackend):
+    """
+    Writes every job to <directory>/receipt_<job id>.pdf.
+    Files appear atomically, so another program (or a test) can watch the folder.
+    """
+
+    name = "spool"
+
+    def __init__(self, generator, directory=DEFAULT_SPOOL_DIR):
+        super().__init__(generator)
+        self.directory = directory
+
+    def send(self, job_id, data):
+        pdf = self.generator.render(data)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, os.path.join(self.directory, f"receipt_{job_id:06d}.pdf"))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class EscPosBackend(PrintBackend):
+    """
+    Thermal printers: the layout rasterized to 1 bit at printer resolution
+    and sent as ESC/POS to a file, device or TCP sink. No PDF, no viewer.
+    """
+
+    name = "escpos"
+
+    def __init__(self, generator, sink, width_dots=DEFAULT_WIDTH_DOTS, font_path=None):
+        super().__init__(generator)
+        self.sink = sink
+        self.renderer = RasterRenderer(width_dots, font_path)
+
+    @traced("escpos.render")
+    def render(self, data):
+        template = self.generator.get_template(self.generator.page_width())
+        if self.renderer.font_path is None:
+            self.renderer.font_path = self.generator.font().path
+        return encode_raster(self.renderer.render(template, data))
+
+    def send(self, job_id, data):
+        self.sink.write(self.render(data))
+
+
+BACKENDS = {
+    ShellPrintBackend.name: ShellPrintBackend,
+    SpoolDirBackend.name: SpoolDirBackend,
+    EscPosBackend.name: EscPosBackend,
+}
+
+
+def create_backend(config, generator):
+    """Backend selected by the "print_backend" setting."""
+    name = config.get("print_backend", ShellPrintBackend.name)
+    if name == SpoolDirBackend.name:
+        return SpoolDirBackend(generator, config.get("spool_dir", DEFAULT_SPOOL_DIR))
+    if name == EscPosBackend.name:
+        return EscPosBackend(
+            generator,
+            create_sink(config.get("escpos_target", "file:receipt.bin")),
+            config.get("escpos_width_dots", DEFAULT_WIDTH_DOTS)
+        )
+    if name not in BACKENDS:
+        print(f"Unknown print backend '{name}', using '{ShellPrintBackend.name}'")
+    return ShellPrintBackend(generator)
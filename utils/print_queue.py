@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+from .db_connection import connections
+from .tracing import tracer
+
+# Jobs live in their own database next to receipts.db, so printing never
+# waits on catalog imports (and vice versa)
+QUEUE_DB = "print_queue.db"
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2.0    # seconds; doubled after every failed attempt
+RETRY_MAX_DELAY = 60.0
+IDLE_WAIT = 5.0           # worker wake-up interval when nothing is due
+# A job still 'printing' this long after it was claimed was left behind by a
+# process that died; younger ones may belong to another running process
+STALE_PRINTING = 600.0
+
+# Job states
+PENDING = "pending"
+PRINTING = "printing"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def queue_db_path(db_name="receipts.db"):
+    return os.path.join(os.path.dirname(connections.resolve(db_name)), QUEUE_DB)
+
+
+def retry_delay(attempts):
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempts - 1)))
+
+
+class PrintQueue:
+    """
+    Persistent print queue with a single worker thread.
+    enqueue() only stores the receipt data and returns at once; the worker
+    renders and sends each job through the backend, retrying failures with
+    exponential backoff. Jobs survive a restart: anything still pending (or
+    left mid-print for over STALE_PRINTING) is picked up again when the
+    queue starts. Jobs are claimed atomically, so several processes (the
+    app and the CLI) can share one queue database.
+    """
+
+    def __init__(self, backend, db_name=None, max_attempts=MAX_ATTEMPTS):
+        self.backend = backend
+        self.db_name = db_name or queue_db_path()
+        self.max_attempts = max_attempts
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        connections.run_once(self.db_name, self.init_db)
+
+    def get_connection(self):
+        return connections.get_connection(self.db_name)
+
+    def init_db(self):
+        conn = self.get_connection()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS print_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    data TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    backend TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_print_jobs_due ON print_jobs (status, next_attempt_at)")
+            # Interrupted while printing (crash/close): try again
+            conn.execute(
+                "UPDATE print_jobs SET status = ? WHERE status = ? AND updated_at < ?",
+                (PENDING, PRINTING, time.time() - STALE_PRINTING)
+            )
+        return True
+
+    def set_backend(self, backend):
+        # Used by the next job that starts
+        old, self.backend = self.backend, backend
+        if old is not backend:
+            old.close()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, data):
+        """Stores a receipt for printing and returns its job id."""
+        now = time.time()
+        conn = self.get_connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO print_jobs (data, status, created_at, updated_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(data, ensure_ascii=False), PENDING, now, now, now)
+            )
+        self._wake.set()
+        return cursor.lastrowid
+
+    def list_jobs(self, limit=100):
+        """Newest first: (id, status, attempts, last_error, created_at, updated_at)."""
+        cursor = self.get_connection().execute(
+            "SELECT id, status, attempts, last_error, created_at, updated_at FROM print_jobs ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+        return cursor.fetchall()
+
+    def counts(self):
+        cursor = self.get_connection().execute("SELECT status, COUNT(*) FROM print_jobs GROUP BY status")
+        return dict(cursor.fetchall())
+
+    def retry(self, job_id):
+        # Failed/cancelled jobs go back to the front of the line
+        conn = self.get_connection()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE print_jobs SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (PENDING, 0, time.time(), job_id, FAILED, CANCELLED)
+            )
+        self._wake.set()
+        return cursor.rowcount > 0
+
+    def cancel(self, job_id):
+        # Only jobs that have not been handed to the backend yet
+        conn = self.get_connection()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE print_jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, PENDING)
+            )
+        return cursor.rowcount > 0
+
+    def clear_finished(self):
+        conn = self.get_connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM print_jobs WHERE status IN (?, ?)", (DONE, CANCELLED))
+        return cursor.rowcount
+
+    def claim(self, job_id):
+        """
+        Marks a pending job as printing; returns (id, data, attempts), or None
+        when it is not pending (another process may have claimed it first).
+        """
+        conn = self.get_connection()
+        with conn:
+            # The status check in the UPDATE makes the claim atomic across processes
+            cursor = conn.execute(
+                "UPDATE print_jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (PRINTING, time.time(), job_id, PENDING)
+            )
+            if cursor.rowcount == 0:
+                return None
+            return conn.execute("SELECT id, data, attempts FROM print_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def claim_next(self):
+        # The GUI and the CLI may share the queue; a job lost to the other one is skipped
+        while True:
+            row = self.get_connection().execute(
+                "SELECT id FROM print_jobs WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at, id LIMIT 1",
+                (PENDING, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            job = self.claim(row[0])
+            if job is not None:
+                return job
+
+    def seconds_until_due(self):
+        row = self.get_connection().execute(
+            "SELECT MIN(next_attempt_at) FROM print_jobs WHERE status = ?", (PENDING,)
+        ).fetchone()
+        if row[0] is None:
+            return IDLE_WAIT
+        return min(IDLE_WAIT, max(0.0, row[0] - time.time()))
+
+    def process(self, job_id, data, attempts):
+        backend = self.backend
+        attempts += 1
+        try:
+            with tracer.span("queue.send", backend=backend.name, attempt=attempts):
+                backend.send(job_id, json.loads(data))
+        except Exception as e:
+            now = time.time()
+            status = FAILED if attempts >= self.max_attempts else PENDING
+            conn = self.get_connection()
+            with conn:
+                conn.execute(
+                    "UPDATE print_jobs SET status = ?, attempts = ?, last_error = ?, backend = ?, updated_at = ?, next_attempt_at = ? WHERE id = ?",
+                    (status, attempts, str(e), backend.name, now, now + retry_delay(attempts), job_id)
+                )
+            print(f"Print job {job_id} failed (attempt {attempts}): {e}")
+            return False
+
+        conn = self.get_connection()
+        with conn:
+            conn.execute(
+                "UPDATE print_jobs SET status = ?, attempts = ?, last_error = NULL, backend = ?, updated_at = ? WHERE id = ?",
+                (DONE, attempts, backend.name, time.time(), job_id)
+            )
+        return True
+
+    def process_job(self, job_id):
+        """
+        Sends one job now, whatever its next attempt time. Returns True/False
+        for sent/failed, or None when the job was not pending.
+        """
+        job = self.claim(job_id)
+        if job is None:
+            return None
+        return self.process(*job)
+
+    def run_pending(self):
+        """Processes every job that is due now; returns how many were sent."""
+        sent = 0
+        while not self._stop.is_set():
+            job = self.claim_next()
+            if job is None:
+                break
+            if self.process(*job):
+                sent += 1
+        return sent
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.run_pending()
+                    wait = self.seconds_until_due()
+                except Exception as e:
+                    print(f"Print queue error: {e}")
+                    wait = IDLE_WAIT
+                self._wake.wait(wait)
+                self._wake.clear()
+        finally:
+            connections.close_thread_connections()
@@ -1,36 +1,41 @@
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4, A5, landscape, portrait
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.units import cm
+import io
 import os
 import sys
-import win32api
-import win32print
-from .text_utils import fix_text
+import tempfile
+import time
+try:
+    import win32api
+    import win32print
+except ImportError:
+    # Not on Windows (or pywin32 missing): only file/raw backends can print
+    win32api = None
+    win32print = None
+from .receipt_template import ReceiptTemplate, draw_lines
+from .fonts import fonts
+from .tracing import tracer, traced
 
-# Register Arabic Font
-FONT_PATH = "C:\\Windows\\Fonts\\arial.ttf"
-FONT_NAME = "Arial"
+# Rendered PDFs are only written to disk when a backend needs a path
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), "receipt_spool")
+SPOOL_MAX_AGE = 3600  # seconds; the shell may still be reading recent files
 
-try:
-    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
-except Exception as e:
-    # Fallback or error handling if font not found
-    print(f"Warning: Could not load Arial font: {e}")
-    FONT_NAME = "Helvetica"
+# Settings the compiled receipt template (header, logo, footer) depends on
+TEMPLATE_SETTINGS = {"header_text", "footer_text", "show_logo", "font_path"}
 
-from reportlab.lib.utils import simpleSplit, ImageReader
-from reportlab.lib.colors import black
 
 class PDFGenerator:
     def __init__(self, config_manager):
         self.config = config_manager
-        self.filename = "receipt.pdf"
+        self.filename = None  # last spilled file
         self.margin = 0.5 * cm
         self.line_height = 1.5 * cm # Approximate line height for spacing
         self.font_size_header = 14
         self.font_size_body = 12
+        self._template = None
+        self._template_key = None
+        self._subscribed = False
 
     def get_logo_path(self):
         extensions = ['.png', '.jpg', '.jpeg', '.bmp']
@@ -39,175 +44,158 @@ class PDFGenerator:
                 return f"icon{ext}"
         return None
 
+    def font(self):
+        # Resolved (and registered) on first use, then cached by the registry
+        return fonts.resolve(self.config)
+
+    def logo_stamp(self, logo_path):
+        # The logo is a file, not a setting: replacing it also rebuilds the template
+        if not logo_path:
+            return None
+        stat = os.stat(logo_path)
+        return (os.path.abspath(logo_path), stat.st_mtime_ns, stat.st_size)
+
+    def get_template(self, width):
+        # Compiled once; settings changes drop it through on_config_change
+        if not self._subscribed:
+            self.config.subscribe(self.on_config_change)
+            self._subscribed = True
+
+        font_name = self.font().name
+        logo_path = self.get_logo_path() if self.config.get("show_logo", False) else None
+        key = (width, font_name, self.logo_stamp(logo_path))
+        template = self._template
+        if template is None or self._template_key != key:
+            with tracer.span("printer.compile_template", logo=bool(logo_path)):
+                template = ReceiptTemplate(
+                    self.config, width, font_name,
+                    self.font_size_header, self.font_size_body, self.margin, logo_path
+                )
+            self._template = template
+            self._template_key = key
+        return template
+
+    def on_config_change(self, changed):
+        if changed & TEMPLATE_SETTINGS:
+            self._template = None
+
+    @traced("printer.calculate_height")
     def calculate_height(self, data, width):
         # Calculate total height required
-        total_height = 0
-        
-        # Margins (Top + Bottom)
-        total_height += 2 * self.margin
-        
-        # Logo
-        if self.config.get("show_logo", False) and self.get_logo_path():
-            total_height += 3.5 * cm
-        
-        # Header
-        header = self.config.get("header_text", "")
-        if header:
-            lines = simpleSplit(header, FONT_NAME, self.font_size_header, width - 2*self.margin)
-            total_height += len(lines) * (self.font_size_header + 5) + 1*cm
-            
-        fields = self.config.get_fields()
-        for field in fields:
-            if not field.get("enabled", True):
-                continue
-            
-            # Label
-            total_height += (self.font_size_body + 5) 
-            
-            # Value (Wrapped)
-            value = data.get(field["id"], "")
-            lines = simpleSplit(value, FONT_NAME, self.font_size_body, width - 2*self.margin)
-            total_height += len(lines) * (self.font_size_body + 5)
-            
-            # Spacing between fields
-            total_height += 0.5 * cm
-            
-        # Footer
-        footer = self.config.get("footer_text", "")
-        if footer:
-             lines = simpleSplit(footer, FONT_NAME, self.font_size_body, width - 2*self.margin)
-             total_height += len(lines) * (self.font_size_body + 5) + 1*cm
-             
-        return total_height
+        template = self.get_template(width)
+        return template.page_height(template.build_body(data))
 
-    def generate(self, data):
+    def page_width(self):
         # Get dimensions in mm and convert to points
         p_width_mm = self.config.get("paper_width", 80)
         # reportlab cm is a constant: 28.3464566929
         # user input 80 is 80mm = 8cm. 
-        p_width = (p_width_mm / 10.0) * cm
-        
+        return (p_width_mm / 10.0) * cm
+
+    def page_height(self, template, body):
         auto_height = self.config.get("auto_height", True)
         
         if auto_height:
-            p_height = self.calculate_height(data, p_width)
-        else:
-            p_height_mm = self.config.get("paper_height", 200)
-            p_height = (p_height_mm / 10.0) * cm
+            return template.page_height(body)
+        p_height_mm = self.config.get("paper_height", 200)
+        return (p_height_mm / 10.0) * cm
+
+    @traced("printer.render")
+    def render(self, data):
+        """
+        Renders a receipt in memory and returns the PDF bytes.
+        Safe to call from several threads; nothing touches the disk.
+        """
+        template = self.get_template(self.page_width())
+        # Shaping, wrapping and measuring the fields
+        with tracer.span("printer.layout"):
+            body = template.build_body(data)
+        buffer = io.BytesIO()
+        self.render_document([body], buffer)
+        return buffer.getvalue()
+
+    @traced("printer.render_document")
+    def render_document(self, bodies, output):
+        """
+        Writes one page per receipt body (from ReceiptTemplate.build_body)
+        to output (path or file object). The static forms are defined once
+        and shared by every page.
+        """
+        template = self.get_template(self.page_width())
+        c = canvas.Canvas(output)
+        template.define_forms(c)
+        for body in bodies:
+            self.draw_page(c, template, body)
+        c.save()
 
-        c = canvas.Canvas(self.filename, pagesize=(p_width, p_height))
+    def draw_page(self, c, template, body):
+        p_width = template.width
+        p_height = self.page_height(template, body)
+        c.setPageSize((p_width, p_height))
         
         # Draw Border
         c.setLineWidth(1)
         c.rect(self.margin/2, self.margin/2, p_width - self.margin, p_height - self.margin)
-        
-        # Start drawing from top
-        y_position = p_height - self.margin
-
-        # Logo
-        if self.config.get("show_logo", False):
-            logo_path = self.get_logo_path()
-            if logo_path:
-                try:
-                    img = ImageReader(logo_path)
-                    img_w, img_h = img.getSize()
-                    
-                    # Scale to max width/height of 3cm
-                    max_size = 3.0 * cm
-                    aspect = img_h / float(img_w)
-                    
-                    if img_w > img_h:
-                        draw_w = min(p_width - 2*self.margin, max_size)
-                        draw_h = draw_w * aspect
-                    else:
-                        draw_h = max_size
-                        draw_w = draw_h / aspect
-                        
-                    # Center
-                    x_pos = (p_width - draw_w) / 2
-                    y_position -= (draw_h + 0.5*cm)
-                    c.drawImage(img, x_pos, y_position + 0.5*cm, width=draw_w, height=draw_h, mask='auto')
-                except Exception as e:
-                    print(f"Error drawing logo: {e}")
-        
-        # Header
-        c.setFont(FONT_NAME, self.font_size_header)
-        header = self.config.get("header_text", "")
-        if header:
-            # Center header
-            lines = simpleSplit(header, FONT_NAME, self.font_size_header, p_width - 2*self.margin)
-            for line in lines:
-                y_position -= (self.font_size_header + 5)
-                # Center align
-                text_width = c.stringWidth(fix_text(line), FONT_NAME, self.font_size_header)
-                c.drawString((p_width - text_width) / 2, y_position, fix_text(line))
-            y_position -= 0.5*cm # Spacing
-            
-        # Fields
-        fields = self.config.get_fields()
-        c.setFont(FONT_NAME, self.font_size_body)
-        
-        for field in fields:
-            if not field.get("enabled", True):
-                continue
-                
-            label = field["label"]
-            value = data.get(field["id"], "")
-            
-            # Draw Label (Right Aligned)
-            # RTL: Label needs to be on the right
-            label_text = fix_text(label + ":")
-            c.drawRightString(p_width - self.margin, y_position - self.font_size_body, label_text)
-            
-            # Move down for value (or same line if we want compact?)
-            # Let's put value on next line for small receipts, or wrapped.
-            # actually for receipt, usually:
-            # Label:
-            # Value
-            
-            y_position -= (self.font_size_body + 5)
-            
-            # Draw Value (Right Aligned or Block)
-            # For multiline, we split text
-            lines = simpleSplit(value, FONT_NAME, self.font_size_body, p_width - 2*self.margin)
-            
-            for line in lines:
-                y_position -= (self.font_size_body + 5)
-                # Right align the value too for Arabic
-                c.drawRightString(p_width - self.margin, y_position, fix_text(line))
-                
-            y_position -= 0.3*cm
-
-        # Footer
-        footer = self.config.get("footer_text", "")
-        if footer:
-            y_position -= 0.5*cm
-            lines = simpleSplit(footer, FONT_NAME, self.font_size_body, p_width - 2*self.margin)
-            for line in lines:
-                y_position -= (self.font_size_body + 5)
-                text_width = c.stringWidth(fix_text(line), FONT_NAME, self.font_size_body)
-                c.drawString((p_width - text_width) / 2, y_position, fix_text(line))
-        
-        c.save()
-        return self.filename
-
-    def open_preview(self):
-        if os.path.exists(self.filename):
-            os.startfile(self.filename)
-
-    def print_file(self):
-        if os.path.exists(self.filename):
-            printer_name = self.config.get("printer_name")
-            if printer_name:
-                 # Set default printer temporarily or use specific win32print command
-                 # easiest way is shell execute with "printto"
-                 try:
-                     win32api.ShellExecute(0, "printto", self.filename, f'"{printer_name}"', ".", 0)
-                 except Exception as e:
-                     print(f"Error printing: {e}")
-            else:
-                # Default printer
-                win32api.ShellExecute(0, "print", self.filename, None, ".", 0)
+
+        # Logo, header and footer (static forms)
+        template.draw_static(c, p_height, body.cursor)
+
+        # Fields (already shaped and positioned from the top)
+        draw_lines(c, body.lines, p_height)
+        c.showPage()
+
+    @traced("printer.generate")
+    def generate(self, data):
+        # Render and write to a unique file (for callers that need a path)
+        return self.spill(self.render(data))
+
+    @traced("printer.spill")
+    def spill(self, pdf):
+        """
+        Writes PDF bytes to a new file in SPOOL_DIR and returns its path.
+        Every call gets its own file, so concurrent jobs never overwrite each other.
+        """
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        cleanup_spool()
+        fd, path = tempfile.mkstemp(prefix="receipt_", suffix=".pdf", dir=SPOOL_DIR)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        self.filename = path
+        return path
+
+    @traced("printer.open_preview")
+    def open_preview(self, pdf=None):
+        # pdf: bytes from render(); defaults to the last spilled file
+        path = self.spill(pdf) if pdf is not None else self.filename
+        if path and os.path.exists(path):
+            os.startfile(path)
+
+    @traced("printer.print_file")
+    def print_file(self, pdf=None):
+        # The shell print verbs need a file, so the bytes are spilled here
+        path = self.spill(pdf) if pdf is not None else self.filename
+        if path and os.path.exists(path):
+            try:
+                self.shell_print(path)
+            except Exception as e:
+                print(f"Error printing: {e}")
+
+    @traced("printer.shell_print")
+    def shell_print(self, path):
+        """
+        Hands a PDF file to the Windows shell print verb.
+        Raises on failure so callers (e.g. the print queue) can retry.
+        """
+        if win32api is None:
+            raise RuntimeError("Windows printing is not available (pywin32 missing)")
+        printer_name = self.config.get("printer_name")
+        if printer_name:
+            # Set default printer temporarily or use specific win32print command
+            # easiest way is shell execute with "printto"
+            win32api.ShellExecute(0, "printto", path, f'"{printer_name}"', ".", 0)
+        else:
+            # Default printer
+            win32api.ShellExecute(0, "print", path, None, ".", 0)
 
     def get_printers(self):
         try:
@@ -222,28 +210,57 @@ class PDFGenerator:
             return "No printer selected"
             
         try:
-            handle = win32print.OpenPrinter(printer_name)
+            return self.query_printer_status(printer_name)
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    @traced("printer.query_status")
+    def query_printer_status(self, printer_name):
+        """
+        Status text for a printer; raises when the printer cannot be queried.
+        Can block for seconds on unreachable network printers.
+        """
+        if win32print is None:
+            raise RuntimeError("Printer status is not available (pywin32 missing)")
+
+        handle = win32print.OpenPrinter(printer_name)
+        try:
             # Level 2 gives detailed info
             info = win32print.GetPrinter(handle, 2)
+        finally:
             win32print.ClosePrinter(handle)
+        
+        status_code = info['Status']
+        
+        if status_code == 0:
+            return "Ready"
+        
+        messages = []
+        if status_code & 0x00000004: messages.append("Paused")
+        if status_code & 0x00000002: messages.append("Error")
+        if status_code & 0x00000008: messages.append("Paper Jam")
+        if status_code & 0x00000010: messages.append("Paper Out")
+        if status_code & 0x00000080: messages.append("Offline")
+        if status_code & 0x00000200: messages.append("Busy")
+        if status_code & 0x00000400: messages.append("Printing")
+        
+        if not messages:
+            return f"Status Code: {status_code}"
             
-            status_code = info['Status']
-            
-            if status_code == 0:
-                return "Ready"
-            
-            messages = []
-            if status_code & 0x00000004: messages.append("Paused")
-            if status_code & 0x00000002: messages.append("Error")
-            if status_code & 0x00000008: messages.append("Paper Jam")
-            if status_code & 0x00000010: messages.append("Paper Out")
-            if status_code & 0x00000080: messages.append("Offline")
-            if status_code & 0x00000200: messages.append("Busy")
-            if status_code & 0x00000400: messages.append("Printing")
-            
-            if not messages:
-                return f"Status Code: {status_code}"
-                
-            return ", ".join(messages)
-        except Exception as e:
-            return f"Error: {str(e)}"
+        return ", ".join(messages)
+
+def cleanup_spool(max_age=SPOOL_MAX_AGE):
+    # ShellExecute returns before the viewer/printer has read the file,
+    # so spilled files are removed later instead of right after use
+    now = time.time()
+    try:
+        names = os.listdir(SPOOL_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(SPOOL_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import namedtuple
+
+POLL_INTERVAL = 5.0     # seconds between checks while the printer answers
+MAX_BACKOFF = 60.0      # longest wait after repeated errors
+
+# Last known state. status is None when no printer is selected,
+# error is the message of the last failed check (status is then stale)
+PrinterStatus = namedtuple("PrinterStatus", "printer status error checked_at")
+
+
+class StatusSource:
+    """Where printer states come from. get_status raises when the printer cannot be reached."""
+
+    def get_status(self, printer_name):
+        raise NotImplementedError
+
+
+class Win32StatusSource(StatusSource):
+    def __init__(self, generator):
+        self.generator = generator  # PDFGenerator
+
+    def get_status(self, printer_name):
+        return self.generator.query_printer_status(printer_name)
+
+
+class PrinterMonitor:
+    """
+    Polls a StatusSource on a worker thread so slow or unreachable printers
+    never block the UI. Keeps the last known status, backs off exponentially
+    while checks fail, and notifies listeners (on the worker thread) only
+    when the status changes.
+    """
+
+    def __init__(self, source, printer_name=None, interval=POLL_INTERVAL, max_backoff=MAX_BACKOFF):
+        self.source = source
+        self.interval = interval
+        self.max_backoff = max_backoff
+
+        self.printer_name = printer_name or ""
+        self.failures = 0
+        self.current = None  # nothing checked yet: the first check always publishes
+
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        # callback(PrinterStatus); runs on the monitor thread
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def set_printer(self, printer_name):
+        # Checked right away; the backoff starts over
+        printer_name = printer_name or ""
+        if printer_name != self.printer_name:
+            self.printer_name = printer_name
+            self.failures = 0
+            self._wake.set()
+
+    def refresh(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def next_delay(self):
+        if not self.failures:
+            return self.interval
+        return min(self.max_backoff, self.interval * (2 ** self.failures))
+
+    def check(self):
+        """Queries the source once and publishes the result if it changed."""
+        printer_name = self.printer_name
+        if not printer_name:
+            self.failures = 0
+            self.publish(PrinterStatus("", None, None, time.time()))
+            return
+
+        try:
+            status = self.source.get_status(printer_name)
+        except Exception as e:
+            self.failures += 1
+            # Keep the last good status for this printer, flag the error
+            current = self.current
+            last = current.status if current is not None and current.printer == printer_name else None
+            self.publish(PrinterStatus(printer_name, last, str(e), time.time()))
+            return
+
+        self.failures = 0
+        self.publish(PrinterStatus(printer_name, status, None, time.time()))
+
+    def publish(self, new):
+        old = self.current
+        self.current = new
+        if old is not None and (old.printer, old.status, old.error) == (new.printer, new.status, new.error):
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(new)
+            except Exception as e:
+                print(f"Printer status listener error: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._wake.wait(self.next_delay())
+            self._wake.clear()
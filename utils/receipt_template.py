@@ -0,0 +1,117 @@
+from PIL import Image
+from reportlab import rl_config
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from .layout import ReceiptLayout, build_header, build_footer, add_fields
+from .tracing import traced
+
+# Logo resolution embedded in the PDF (plenty for receipt printers)
+LOGO_DPI = 300
+
+# Embed images as binary streams: the ASCII85 text encoding is pure Python
+# when reportlab's C accelerator is missing and was most of the render time.
+# This is deliberately process-wide. Every canvas in the app goes through
+# here, and binary streams are valid for any PDF reader. reportlab reads the
+# flag while objects are created, so setting and restoring it around each
+# render would race between the GUI and print-queue threads.
+rl_config.useA85 = 0
+
+# Extra room around static blocks so descenders are not clipped by the form bbox
+FORM_PADDING = 1 * cm
+
+
+class CachedImage:
+    """
+    Logo decoded and scaled to print resolution once per template. It is
+    drawn inside the header form XObject, so each PDF embeds it only once.
+    """
+
+    @traced("template.load_logo")
+    def __init__(self, path, width, height):
+        img = Image.open(path)
+        if img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGBA')
+        img.thumbnail((int(width / 72.0 * LOGO_DPI), int(height / 72.0 * LOGO_DPI)), Image.LANCZOS)
+        self.image = img
+
+    def draw(self, c, x, y, width, height):
+        # A fresh reader per canvas; the scaled image itself is shared
+        c.drawImage(ImageReader(self.image), x, y, width=width, height=height, mask='auto')
+
+
+class ReceiptTemplate:
+    """
+    Static parts of a receipt (logo + header, footer) for one configuration,
+    laid out, shaped and measured once. In a PDF they are emitted as form
+    XObjects defined once per document and placed on every page.
+    """
+
+    HEADER_FORM = "receipt_header"
+    FOOTER_FORM = "receipt_footer"
+
+    def __init__(self, config, width, font, header_size, body_size, margin, logo_path=None):
+        self.config = config
+        self.width = width
+        self.font = font
+        self.body_size = body_size
+        self.margin = margin
+
+        self.header = build_header(config, width, font, header_size, margin, logo_path)
+        self.footer = build_footer(config, width, font, body_size, margin)
+
+        self.logo = None
+        if self.header.images:
+            image = self.header.images[0]
+            try:
+                self.logo = CachedImage(image.path, image.width, image.height)
+            except Exception as e:
+                print(f"Error loading logo: {e}")
+
+    def build_body(self, data):
+        """Field labels and values, starting right below the header."""
+        body = ReceiptLayout(self.width, self.margin)
+        body.cursor = self.header.cursor
+        add_fields(body, self.config, data, self.font, self.body_size)
+        return body
+
+    def page_height(self, body):
+        return body.cursor + self.footer.cursor + self.margin
+
+    def define_forms(self, c):
+        # Once per document, before the first page is drawn
+        self.define_form(c, self.HEADER_FORM, self.header)
+        self.define_form(c, self.FOOTER_FORM, self.footer)
+
+    def define_form(self, c, name, block):
+        # Form coordinates: origin at the bottom of the block
+        height = block.cursor
+        c.beginForm(name, 0, -FORM_PADDING, self.width, height + FORM_PADDING)
+        for image in block.images:
+            if self.logo is not None:
+                self.logo.draw(c, image.x, height - image.y, image.width, image.height)
+            else:
+                c.drawImage(image.path, image.x, height - image.y, width=image.width, height=image.height, mask='auto')
+        draw_lines(c, block.lines, height)
+        c.endForm()
+
+    def draw_static(self, c, page_height, footer_top):
+        # Header at the top of the page, footer right below the fields
+        c.saveState()
+        c.translate(0, page_height - self.header.cursor)
+        c.doForm(self.HEADER_FORM)
+        c.restoreState()
+
+        c.saveState()
+        c.translate(0, page_height - footer_top - self.footer.cursor)
+        c.doForm(self.FOOTER_FORM)
+        c.restoreState()
+
+
+def draw_lines(c, lines, top):
+    # LineBox y is measured down from `top`
+    current_font = None
+    for line in lines:
+        if (line.font, line.size) != current_font:
+            current_font = (line.font, line.size)
+            c.setFont(line.font, line.size)
+        c.drawString(line.x, top - line.y, line.text)
@@ -0,0 +1,147 @@
+import heapq
+import threading
+from array import array
+from .index_registry import IndexRegistry
+
+NGRAM = 3
+
+# Compact the arrays once this share of slots belongs to deleted rows
+COMPACT_RATIO = 0.5
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class NgramIndex:
+    """
+    In-process trigram index over the medications table.
+    Rows live in compact parallel arrays (one slot per row) and every
+    trigram maps to a posting list of slots. Deleted rows are tombstoned
+    and dropped on the next compaction.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.ids = array('q')     # slot -> medication id (-1 = deleted)
+            self.names_ar = []        # slot -> name_ar
+            self.names_en = []        # slot -> name_en
+            self.keys = []            # slot -> lowercased search text
+            self.slots = {}           # medication id -> slot
+            self.postings = {}        # trigram -> array of slots (ascending)
+            self.deleted = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def load(self, rows):
+        with self.lock:
+            self.clear()
+            for med_id, name_ar, name_en in rows:
+                self._append(med_id, name_ar, name_en)
+
+    def _append(self, med_id, name_ar, name_en):
+        name_ar = name_ar or ""
+        name_en = name_en or ""
+        slot = len(self.ids)
+        # Newline keeps words from matching across the two names
+        key = f"{name_ar.lower()}\n{name_en.lower()}"
+
+        self.ids.append(med_id)
+        self.names_ar.append(name_ar)
+        self.names_en.append(name_en)
+        self.keys.append(key)
+        self.slots[med_id] = slot
+
+        for gram in ngrams(key):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('i')
+            posting.append(slot)
+
+    def add(self, med_id, name_ar, name_en):
+        with self.lock:
+            if med_id in self.slots:
+                self.remove(med_id)
+            self._append(med_id, name_ar, name_en)
+
+    def remove(self, med_id):
+        with self.lock:
+            slot = self.slots.pop(med_id, None)
+            if slot is None:
+                return
+            self.ids[slot] = -1
+            self.keys[slot] = None
+            self.deleted += 1
+
+            if self.deleted > len(self.ids) * COMPACT_RATIO:
+                self.compact()
+
+    def compact(self):
+        with self.lock:
+            rows = [
+                (self.ids[slot], self.names_ar[slot], self.names_en[slot])
+                for slot in range(len(self.ids)) if self.ids[slot] != -1
+            ]
+            self.load(rows)
+
+    def candidates(self, word):
+        # Slots containing every trigram of the word (smallest list first)
+        lists = []
+        for gram in ngrams(word):
+            posting = self.postings.get(gram)
+            if posting is None:
+                return set()
+            lists.append(posting)
+        lists.sort(key=len)
+
+        result = set(lists[0])
+        for posting in lists[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def search(self, query, limit=None):
+        # Same semantics as DatabaseManager.search_medications:
+        # every word must appear in name_ar or name_en
+        words = query.lower().split()
+        if not words:
+            return []
+
+        with self.lock:
+            keys = self.keys
+            long_words = sorted((w for w in words if len(w) >= NGRAM), key=len, reverse=True)
+
+            if long_words:
+                slots = None
+                for word in long_words:
+                    found = self.candidates(word)
+                    slots = found if slots is None else slots & found
+                    if not slots:
+                        return []
+            else:
+                slots = range(len(keys))
+
+            matches = []
+            for slot in slots:
+                key = keys[slot]
+                if key is not None and all(w in key for w in words):
+                    matches.append(slot)
+
+            if limit:
+                matches = heapq.nsmallest(limit, matches, key=lambda slot: self.names_ar[slot])
+            else:
+                matches.sort(key=lambda slot: self.names_ar[slot])
+
+            return [(self.ids[slot], self.names_ar[slot], self.names_en[slot]) for slot in matches]
+
+
+# Process-wide indexes, one per database file
+registry = IndexRegistry(NgramIndex)
+get_index = registry.get
+load_index = registry.load
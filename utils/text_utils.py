@@ -1,12 +1,43 @@
+import re
+from functools import lru_cache
 import arabic_reshaper
 from bidi.algorithm import get_display
 
-def fix_text(text):
-    if not text:
-        return ""
+# Shaped strings kept in memory (receipt labels/header/footer repeat constantly)
+SHAPE_CACHE_SIZE = 4096
+
+# Hebrew, Arabic, Syriac, Thaana, NKo... and the Arabic presentation forms
+RTL_PATTERN = re.compile(r'[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFF]')
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def shape_text(text):
     try:
         reshaped_text = arabic_reshaper.reshape(text)
         bidi_text = get_display(reshaped_text)
         return bidi_text
     except Exception:
         return text
+
+def fix_text(text):
+    if not text:
+        return ""
+    # Fast path: nothing to reshape or reorder
+    if not RTL_PATTERN.search(text):
+        return text
+    return shape_text(text)
+
+def fix_lines(lines):
+    """
+    Shapes many lines at once (e.g. a wrapped paragraph).
+    """
+    return [fix_text(line) for line in lines]
+
+def shape_cache_stats():
+    """
+    Returns {"hits", "misses", "size", "maxsize"} for the shaping cache.
+    """
+    info = shape_text.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+def clear_shape_cache():
+    shape_text.cache_clear()
@@ -0,0 +1,355 @@
+"""
+Timing spans for the hot paths (search, import, render, print).
+
+    with tracer.span("printer.layout", lines=12):
+        ...
+
+    @traced("db.search_medications")
+    def search_medications(self, query): ...
+
+Tracing is off by default: span() then returns a shared no-op object and
+traced functions only check one attribute before calling through. When it
+is on, every finished span updates per-operation stats (count, errors,
+recent durations for p50/p95) and is queued for a background thread that
+appends it to a rotating JSON-lines log and rewrites a Prometheus text
+file with the stats.
+"""
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# Files written while tracing is on (relative to the working directory)
+LOG_DIR = "logs"
+SPAN_LOG = "spans.jsonl"
+METRICS_FILE = "metrics.prom"
+
+# Span log rotation: spans.jsonl, spans.jsonl.1 ... spans.jsonl.<LOG_BACKUPS>
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+# Recent durations kept per operation for the percentiles
+WINDOW_SIZE = 1024
+
+# Seconds between writes of the span log / rewrites of the Prometheus file
+FLUSH_INTERVAL = 1
+METRICS_INTERVAL = 15
+
+# Spans waiting for the writer thread; more are counted as dropped
+MAX_PENDING = 50000
+
+# inspect.CO_GENERATOR; inspect itself takes ~20 ms to import
+CO_GENERATOR = 0x20
+
+# Set to 1 to trace regardless of the "tracing" setting
+TRACE_ENV = "RECEIPT_TRACE"
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def rotate_log(path, backups):
+    # spans.jsonl -> spans.jsonl.1 -> ... -> spans.jsonl.<backups> (oldest dropped)
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    if backups > 0:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+
+class OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=WINDOW_SIZE)
+
+    def add(self, duration, error):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        if error:
+            self.errors += 1
+        self.recent.append(duration)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+
+    def set(self, **attrs):
+        # Attributes only known at the end (row counts, sizes, ...)
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.started = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        stack = self.tracer.stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        elif self in stack:
+            stack.remove(self)
+        self.tracer.record(self.name, self.started, duration, self.attrs,
+                           exc_type.__name__ if exc_type else None, self.parent)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.log_dir = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}  # {operation: OperationStats}
+        self._pending = []  # finished spans not yet in the log
+        self._dropped = 0
+        self._stop = threading.Event()
+        self._writer = None
+        self._atexit = False
+
+    def configure(self, config):
+        """Turns tracing on or off from the "tracing" setting (or RECEIPT_TRACE=1)."""
+        if config.get("tracing", False) or os.environ.get(TRACE_ENV) == "1":
+            self.enable()
+        else:
+            self.disable()
+
+    def enable(self, log_dir=LOG_DIR):
+        with self._lock:
+            if self.enabled and self.log_dir == log_dir:
+                return
+        self.disable()
+
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Could not start tracing: {e}")
+            return
+
+        with self._lock:
+            self.log_dir = log_dir
+            self._stop = threading.Event()
+            self._writer = threading.Thread(target=self._write_loop, args=(self._stop,),
+                                            name="trace-writer", daemon=True)
+            self._writer.start()
+            if not self._atexit:
+                import atexit
+                atexit.register(self.disable)
+                self._atexit = True
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._stop.set()
+            writer = self._writer
+            self._writer = None
+        writer.join(timeout=5)
+        self.flush()
+        self.write_metrics()
+
+    def stack(self):
+        # Open spans of the current thread, innermost last
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name, started, duration, attrs=None, error=None, parent=None):
+        # Only in-memory work here; the writer thread serializes and writes
+        thread = threading.current_thread().name
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = OperationStats()
+            stats.add(duration, error)
+            if self.enabled:
+                if len(self._pending) < MAX_PENDING:
+                    self._pending.append((started, name, duration, thread, parent, error, attrs))
+                else:
+                    self._dropped += 1
+
+    def snapshot(self):
+        """[(operation, count, errors, p50, p95, max)] with durations in seconds, by operation."""
+        with self._lock:
+            items = [(name, s.count, s.errors, sorted(s.recent), s.max) for name, s in self._stats.items()]
+        return [
+            (name, count, errors, percentile(recent, 0.5), percentile(recent, 0.95), max_)
+            for name, count, errors, recent, max_ in sorted(items)
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def flush(self):
+        """Appends the finished spans to the JSON-lines log."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            dropped, self._dropped = self._dropped, 0
+        if not (pending or dropped) or not self.log_dir:
+            return
+
+        lines = []
+        for started, name, duration, thread, parent, error, attrs in pending:
+            entry = {"ts": round(started, 6), "op": name, "ms": round(duration * 1000, 3), "thread": thread}
+            if parent:
+                entry["parent"] = parent
+            if error:
+                entry["error"] = error
+            if attrs:
+                entry["attrs"] = attrs
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        if dropped:
+            lines.append(json.dumps({"ts": round(time.time(), 6), "dropped": dropped}) + "\n")
+
+        path = os.path.join(self.log_dir, SPAN_LOG)
+        try:
+            if os.path.exists(path) and os.path.getsize(path) >= LOG_MAX_BYTES:
+                rotate_log(path, LOG_BACKUPS)
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError as e:
+            print(f"Could not write span log: {e}")
+
+    def prometheus_text(self):
+        with self._lock:
+            items = [(name, s.count, s.errors, s.total, sorted(s.recent)) for name, s in self._stats.items()]
+
+        lines = [
+            "# HELP receipt_operation_seconds Duration of traced operations (recent window quantiles).",
+            "# TYPE receipt_operation_seconds summary",
+        ]
+        errors = [
+            "# HELP receipt_operation_errors_total Traced operations that raised.",
+            "# TYPE receipt_operation_errors_total counter",
+        ]
+        for name, count, error_count, total, recent in sorted(items):
+            label = 'op="%s"' % name.replace("\\", "\\\\").replace('"', '\\"')
+            for q in (0.5, 0.95):
+                lines.append(f'receipt_operation_seconds{{{label},quantile="{q}"}} {percentile(recent, q):.6f}')
+            lines.append(f"receipt_operation_seconds_sum{{{label}}} {total:.6f}")
+            lines.append(f"receipt_operation_seconds_count{{{label}}} {count}")
+            errors.append(f"receipt_operation_errors_total{{{label}}} {error_count}")
+        return "\n".join(lines + errors) + "\n"
+
+    def write_metrics(self):
+        log_dir = self.log_dir
+        if not log_dir:
+            return
+        path = os.path.join(log_dir, METRICS_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            # Scrapers (node_exporter textfile collector) must never see half a file
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write metrics: {e}")
+
+    def _write_loop(self, stop):
+        next_metrics = time.monotonic() + METRICS_INTERVAL
+        while not stop.wait(FLUSH_INTERVAL):
+            self.flush()
+            if time.monotonic() >= next_metrics:
+                self.write_metrics()
+                next_metrics = time.monotonic() + METRICS_INTERVAL
+
+
+tracer = Tracer()
+
+
+def traced(name):
+    """
+    Decorator: runs the function inside a span. For generator functions the
+    span covers only the time spent producing items, not the consumer's
+    work between them.
+    """
+    def decorate(func):
+        if func.__code__.co_flags & CO_GENERATOR:
+            @functools.wraps(func)
+            def gen_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return (yield from func(*args, **kwargs))
+                return (yield from _traced_items(name, func(*args, **kwargs)))
+            return gen_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _traced_items(name, gen):
+    stack = tracer.stack()
+    parent = stack[-1].name if stack else None
+    started = time.time()
+    busy = 0.0
+    items = 0
+    error = None
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(gen)
+            except StopIteration as stop:
+                busy += time.perf_counter() - start
+                return stop.value
+            except BaseException as e:
+                busy += time.perf_counter() - start
+                error = type(e).__name__
+                raise
+            busy += time.perf_counter() - start
+            items += 1
+            yield item
+    finally:
+        gen.close()
+        tracer.record(name, started, busy, {"items": items}, error, parent)